@@ -0,0 +1,66 @@
+"""
+Micro-benchmark del renderizado de emails de orden.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_email_render [--number 200]
+"""
+import argparse
+import timeit
+from zoneinfo import ZoneInfo
+
+from models.order import Order
+from services.email_templates import render_customer_confirmation, render_order_notification
+from services.settings import DEFAULT_TIMEZONE
+
+CART_SIZES = (1, 50, 500)
+
+
+def make_order(items: int) -> Order:
+    return Order(
+        customer={
+            "nombre": "María <Pérez> & Hijos",
+            "email": "maria@example.com",
+            "telefono": "809-555-0101",
+            "dni_rnc": "001-1234567-8",
+            "whatsapp": "8095550101",
+        },
+        shipping={
+            "provincia": "Santo Domingo",
+            "ciudad": "Santo Domingo Este",
+            "direccion": "Calle 5 #12, Ensanche Ozama",
+            "referencias": "Frente al colmado \"Don José\"",
+        },
+        payment={"metodo_pago": "Visa", "total": 89.99 * items},
+        items=[
+            {
+                "id": i % 9 + 1,
+                "name": f"Pantalón Air Classic {i}",
+                "price": 89.99,
+                "quantity": 1 + i % 3,
+                "selectedSize": "M",
+                "image": f"https://images.example.com/products/{i}.jpg",
+            }
+            for i in range(items)
+        ],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del renderizado de emails")
+    parser.add_argument("--number", type=int, default=200, help="renders por medición")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tz = ZoneInfo(DEFAULT_TIMEZONE)
+    print(f"{'items':>6} {'notificación (µs)':>20} {'confirmación (µs)':>20}")
+    for size in CART_SIZES:
+        order = make_order(size)
+        timings = []
+        for render in (render_order_notification, render_customer_confirmation):
+            best = min(timeit.repeat(lambda: render(order, tz), number=args.number, repeat=args.repeat))
+            timings.append(best / args.number * 1e6)
+        print(f"{size:>6} {timings[0]:>20.1f} {timings[1]:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
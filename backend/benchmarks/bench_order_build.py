@@ -0,0 +1,109 @@
+"""
+Compara el coste de pasar de un payload de checkout al documento que se
+guarda en MongoDB:
+
+- antes: Order(...) con las partes de OrderCreate + .dict() (API obsoleta)
+- model_construct: Order.model_construct(...) + model_dump()
+- ahora: Order.from_create(...) + to_document()
+
+Todos incluyen la validación del payload como OrderCreate, que es lo que paga
+cada petición y lo único que crece con el carrito además del volcado, y los
+campos de búsqueda (`search`) que to_document añade al documento, para que
+los tres produzcan lo mismo.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_order_build [--sizes 1 10 50 100 500] [--number 200]
+"""
+import argparse
+import timeit
+import warnings
+
+from benchmarks.bench_email_render import make_order
+from models.order import Order, OrderCreate
+from models.search import search_keys
+
+DEFAULT_SIZES = (1, 10, 50, 100, 500)
+
+
+def make_payload(items: int) -> dict:
+    order = make_order(items)
+    return order.model_dump(include={"customer", "shipping", "payment", "items"})
+
+
+def legacy_path(payload: dict) -> dict:
+    order_data = OrderCreate.model_validate(payload)
+    order = Order(
+        customer=order_data.customer,
+        shipping=order_data.shipping,
+        payment=order_data.payment,
+        items=order_data.items
+    )
+    document = order.dict()
+    document["search"] = search_keys(document["customer"])
+    return document
+
+
+def model_construct_path(payload: dict) -> dict:
+    order_data = OrderCreate.model_validate(payload)
+    order = Order.model_construct(
+        customer=order_data.customer,
+        shipping=order_data.shipping,
+        payment=order_data.payment,
+        items=order_data.items
+    )
+    document = order.model_dump()
+    document["search"] = search_keys(document["customer"])
+    return document
+
+
+def from_create_path(payload: dict) -> dict:
+    order_data = OrderCreate.model_validate(payload)
+    return Order.from_create(order_data).to_document()
+
+
+PATHS = (
+    ("antes", legacy_path),
+    ("model_construct", model_construct_path),
+    ("from_create", from_create_path),
+)
+
+# Campos que cambian en cada orden construida
+VOLATILE_FIELDS = ("id", "order_number", "created_at", "updated_at")
+
+
+def build_documents(payload: dict) -> list:
+    """
+    Documento de cada camino sin los campos que cambian de una orden a otra
+    """
+    documents = []
+    for _, build in PATHS:
+        document = build(payload)
+        for field in VOLATILE_FIELDS:
+            document.pop(field, None)
+        documents.append(document)
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de construcción de órdenes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+    # .dict() está obsoleto en pydantic 2; el aviso no debe contar en la medición
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    print(f"{'artículos':>9}" + "".join(f"  {name + ' µs':>18}" for name, _ in PATHS) + f"  {'aceleración':>11}")
+    for size in args.sizes:
+        payload = make_payload(size)
+        first, *others = build_documents(payload)
+        assert all(document == first for document in others)
+        number = max(1, args.number // max(1, size // 10))
+        times = []
+        for _, build in PATHS:
+            best = min(timeit.repeat(lambda: build(payload), number=number, repeat=5))
+            times.append(best / number * 1e6)
+        print(f"{size:>9}" + "".join(f"  {value:>18.1f}" for value in times) + f"  {times[0] / times[-1]:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
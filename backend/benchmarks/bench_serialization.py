@@ -0,0 +1,59 @@
+"""
+Compara el coste de serializar una página de 50 órdenes con el camino
+genérico de FastAPI (jsonable_encoder + json.dumps) frente a MongoJSONResponse.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_serialization [--orders 50] [--items 3]
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.bench_email_render import make_order
+from services.serialization import MongoJSONResponse
+
+
+def make_page(orders: int, items: int) -> dict:
+    docs = []
+    now = datetime.utcnow()
+    for i in range(orders):
+        doc = make_order(items).to_document()
+        doc["_id"] = ObjectId()
+        doc["created_at"] = doc["updated_at"] = now - timedelta(minutes=i)
+        docs.append(doc)
+    return {"orders": docs, "total": 100000, "limit": orders, "next": "eyJkIjoiMjAyNC0wMS0wMVQwMDowMDowMCJ9"}
+
+
+def fastapi_path(page: dict) -> bytes:
+    # El encoder genérico necesita que se le indique cómo convertir ObjectId
+    return JSONResponse(jsonable_encoder(page, custom_encoder={ObjectId: str})).body
+
+
+def orjson_path(page: dict) -> bytes:
+    return MongoJSONResponse(page).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialización de órdenes")
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    page = make_page(args.orders, args.items)
+    results = {}
+    for name, render in (("jsonable_encoder + json", fastapi_path), ("MongoJSONResponse (orjson)", orjson_path)):
+        best = min(timeit.repeat(lambda: render(page), number=args.number, repeat=5))
+        results[name] = best / args.number * 1e6
+        print(f"{name:<28} {results[name]:>10.1f} µs/página  ({len(render(page)):,} bytes)")
+
+    baseline, fast = results.values()
+    print(f"Aceleración: {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Mide el tiempo de importar `server` con `python -X importtime` y falla si
+supera el presupuesto, para detectar en CI dependencias pesadas que se cuelan
+en el arranque de los pods. tests/test_startup.py aplica el mismo
+presupuesto en la suite de tests.
+
+Cada medición se hace en un proceso nuevo (arranque en frío de Python, sin
+caché de módulos); se informa la mediana, los módulos que más tiempo propio
+consumen y se comprueba que ninguno de los paquetes opcionales pesados
+(pandas, numpy, boto3...) se importe al arrancar.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 1500] [--top 15]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+# Paquetes que están en requirements.txt pero no deben cargarse al arrancar
+FORBIDDEN_AT_STARTUP = ("pandas", "numpy", "boto3", "botocore", "jose", "jq", "passlib", "requests_oauthlib")
+DEFAULT_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "1500"))
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure_import(module: str) -> list:
+    """
+    Importa el módulo en un intérprete nuevo y devuelve
+    (módulo, µs propios, µs acumulados, profundidad) por cada import
+    """
+    # Se permite escribir los .pyc para que la ejecución de calentamiento los deje listos
+    env = {name: value for name, value in os.environ.items() if name != "PYTHONDONTWRITEBYTECODE"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def import_time_ms(rows: list, module: str) -> float:
+    """
+    Tiempo acumulado del import de primer nivel de `module`, en ms
+    """
+    top_level = next(row for row in reversed(rows) if row[0] == module and row[3] == 0)
+    return top_level[2] / 1000
+
+
+def forbidden_imports(rows: list) -> list:
+    """
+    Paquetes de FORBIDDEN_AT_STARTUP que se cargaron durante el import
+    """
+    loaded = {row[0].split(".")[0] for row in rows}
+    return sorted(loaded.intersection(FORBIDDEN_AT_STARTUP))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de arranque")
+    parser.add_argument("--module", default="server")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # La primera ejecución compila los .pyc y no cuenta
+    measure_import(args.module)
+    totals = []
+    rows = []
+    for _ in range(args.runs):
+        rows = measure_import(args.module)
+        totals.append(import_time_ms(rows, args.module))
+
+    print(f"Tiempos propios más altos al importar {args.module}:")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {name:<45} {self_us / 1000:>8.1f} ms  (acumulado {cumulative_us / 1000:.1f} ms)")
+
+    ok = True
+    forbidden = forbidden_imports(rows)
+    if forbidden:
+        ok = False
+        print(f"\nMódulos pesados importados al arrancar: {', '.join(forbidden)}")
+
+    median = statistics.median(totals)
+    print(f"\nimport {args.module}: mediana {median:.1f} ms, mín {min(totals):.1f} ms, "
+          f"máx {max(totals):.1f} ms ({args.runs} ejecuciones, {len(rows)} módulos)")
+    if median > args.budget_ms:
+        ok = False
+        print(f"Supera el presupuesto de {args.budget_ms:.0f} ms")
+    else:
+        print(f"Dentro del presupuesto de {args.budget_ms:.0f} ms")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
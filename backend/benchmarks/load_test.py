@@ -0,0 +1,245 @@
+"""
+Prueba de carga reproducible del flujo de órdenes.
+
+Levanta la app de FastAPI con uvicorn en un hilo, contra un mongod local (o un
+sustituto en memoria con mongomock-motor) y un servidor SMTP local, y lanza
+POST /api/orders, GET /api/orders y GET /api/orders/{id} con la concurrencia
+indicada. Informa throughput y percentiles de latencia y guarda un JSON que
+sirve de línea base para comparar entre commits.
+
+Uso (desde backend/):
+    python -m benchmarks.load_test --requests 2000 --concurrency 32
+    python -m benchmarks.load_test --in-memory --save benchmarks/results/base.json
+    python -m benchmarks.load_test --compare benchmarks/results/base.json
+
+Requiere httpx, aiosmtpd y, para --in-memory, mongomock-motor.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+# Reparto de tamaños de carrito: la mayoría de las órdenes tienen pocos artículos
+CART_SIZES = (1, 1, 1, 2, 2, 3, 4, 6, 10)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def make_payload(products, rng: random.Random) -> dict:
+    items = []
+    for _ in range(rng.choice(CART_SIZES)):
+        product = rng.choice(products)
+        items.append({
+            "id": product["id"],
+            "name": product["name"],
+            "price": product["price"],
+            "quantity": rng.randint(1, 3),
+            "selectedSize": rng.choice(product["sizes"]),
+            "image": product["image"],
+        })
+    n = rng.randint(1, 10**6)
+    return {
+        "customer": {
+            "nombre": f"Cliente {n}",
+            "email": f"cliente{n}@example.com",
+            "telefono": f"809-555-{n % 10000:04d}",
+            "dni_rnc": f"001-{n:07d}-1",
+            "whatsapp": f"809555{n % 10000:04d}",
+        },
+        "shipping": {"provincia": rng.choice(["Santo Domingo", "Santiago", "La Vega", "Puerto Plata"]),
+                     "ciudad": "Centro", "direccion": f"Calle {n % 100} #{n % 50}"},
+        "payment": {"metodo_pago": rng.choice(["Visa", "Mastercard", "Apple Pay"]),
+                    "total": sum(item["price"] * item["quantity"] for item in items)},
+        "items": items,
+    }
+
+
+def start_app(args):
+    """
+    Configura el entorno, importa la app y la sirve con uvicorn en un hilo
+    """
+    from scripts.smtp_sink import start_sink
+
+    smtp_port = free_port()
+    sink = start_sink(port=smtp_port)
+    os.environ.update({
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(smtp_port),
+        "SMTP_USE_TLS": "false",
+        "GMAIL_PASS": "",
+        "DB_NAME": args.db_name,
+    })
+    if args.mongo_url:
+        os.environ["MONGO_URL"] = args.mongo_url
+    if args.in_memory:
+        import mongomock_motor
+        import motor.motor_asyncio
+        motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+
+    import uvicorn
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+
+    port = free_port()
+    config = uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning")
+    uv = uvicorn.Server(config)
+    thread = threading.Thread(target=uv.run, daemon=True)
+    thread.start()
+    while not uv.started:
+        time.sleep(0.05)
+    return server, uv, thread, sink, f"http://127.0.0.1:{port}"
+
+
+async def run_scenario(name, make_request, total: int, concurrency: int):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await make_request(i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    result = {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+    print(f"{name:<12} {result['throughput_rps']:>9.1f} req/s  p50 {result['p50_ms']:>7.2f} ms  "
+          f"p90 {result['p90_ms']:>7.2f} ms  p99 {result['p99_ms']:>7.2f} ms  errores {errors}")
+    return result
+
+
+async def drive(base_url: str, args) -> dict:
+    rng = random.Random(args.seed)
+    products = [p for p in json.loads((BACKEND_DIR / "data" / "products.json").read_text()) if p["inStock"]]
+    payloads = [make_payload(products, rng) for _ in range(args.requests)]
+    order_ids = []
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def create(i):
+            response = await client.post("/api/orders", json=payloads[i])
+            if response.status_code == 200:
+                order_ids.append(response.json()["order_id"])
+            return response
+
+        async def list_orders(i):
+            return await client.get("/api/orders", params={"limit": 50, "view": args.list_view})
+
+        async def get_order(i):
+            return await client.get(f"/api/orders/{order_ids[i % len(order_ids)]}")
+
+        results = {"create": await run_scenario("POST orders", create, args.requests, args.concurrency)}
+        results["list"] = await run_scenario("GET orders", list_orders, args.requests, args.concurrency)
+        if order_ids:
+            results["get"] = await run_scenario("GET order", get_order, args.requests, args.concurrency)
+    return results
+
+
+def compare(results: dict, baseline_path: Path, tolerance: float) -> bool:
+    baseline = json.loads(baseline_path.read_text())
+    print(f"\nComparación con {baseline_path} (commit {baseline.get('commit')}):")
+    ok = True
+    for scenario, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(scenario)
+        if not previous:
+            continue
+        for metric in ("throughput_rps", "p99_ms"):
+            before, after = previous[metric], current[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            worse = change < -tolerance if metric == "throughput_rps" else change > tolerance
+            ok &= not worse
+            print(f"  {scenario:<8} {metric:<15} {before:>9.2f} -> {after:>9.2f} ({change:+.1f}%){'  REGRESIÓN' if worse else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del flujo de órdenes")
+    parser.add_argument("--requests", type=int, default=1000, help="peticiones por escenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mongo-url", default=None, help="por defecto MONGO_URL de backend/.env")
+    parser.add_argument("--in-memory", action="store_true", help="usar mongomock-motor en lugar de mongod")
+    parser.add_argument("--db-name", default=f"airstore_bench_{int(time.time())}")
+    parser.add_argument("--list-view", default="summary", choices=["summary", "full"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", type=Path, help="guardar resultados en este JSON")
+    parser.add_argument("--compare", type=Path, help="comparar con una línea base guardada")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="%% de empeoramiento tolerado")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    _, uv, thread, sink, base_url = start_app(args)
+    try:
+        scenarios = asyncio.run(drive(base_url, args))
+    finally:
+        uv.should_exit = True
+        thread.join(timeout=10)
+        if not args.in_memory:
+            from pymongo import MongoClient
+            with MongoClient(os.environ["MONGO_URL"]) as mongo:
+                mongo.drop_database(args.db_name)
+        sink.stop()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {"requests": args.requests, "concurrency": args.concurrency,
+                   "in_memory": args.in_memory, "list_view": args.list_view, "seed": args.seed},
+        "scenarios": scenarios,
+    }
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Resultados guardados en {args.save}")
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 import uuid
 
+from models.search import search_keys
+
 class CustomerInfo(BaseModel):
     nombre: str
     email: str
@@ -49,9 +51,50 @@ class Order(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    def dict(self, **kwargs):
-        # Convert datetime objects to strings for MongoDB storage
-        result = super().dict(**kwargs)
-        result['created_at'] = self.created_at.isoformat()
-        result['updated_at'] = self.updated_at.isoformat()
-        return result
\ No newline at end of file
+    @classmethod
+    def from_create(cls, order_data: OrderCreate, **overrides) -> "Order":
+        """
+        Construye la orden con las partes ya validadas de un OrderCreate.
+
+        Pydantic no revalida instancias de modelos que ya lo son
+        (revalidate_instances="never"), así que el coste no crece con el
+        carrito; `model_construct` resulta más lento porque rellena los campos
+        en Python (ver benchmarks/bench_order_build.py).
+        """
+        now = datetime.utcnow()
+        fields = {
+            "customer": order_data.customer,
+            "shipping": order_data.shipping,
+            "payment": order_data.payment,
+            "items": order_data.items,
+            "created_at": now,
+            "updated_at": now,
+        }
+        fields.update(overrides)
+        return cls(**fields)
+
+    def to_document(self) -> dict:
+        """
+        Documento para MongoDB en una sola pasada (fechas como datetime de BSON),
+        con los campos normalizados para la búsqueda de soporte
+        """
+        document = self.model_dump()
+        document["search"] = search_keys(document["customer"])
+        return document
+
+
+# Estados de una orden y desde cuáles se puede llegar a cada uno
+ORDER_STATUSES = ("pending", "confirmed", "shipped", "delivered")
+STATUS_TRANSITIONS = {
+    "pending": (),
+    "confirmed": ("pending",),
+    "shipped": ("confirmed",),
+    "delivered": ("shipped",),
+}
+
+class OrderStatusUpdate(BaseModel):
+    status: Literal["pending", "confirmed", "shipped", "delivered"]
+    expected_status: Optional[Literal["pending", "confirmed", "shipped", "delivered"]] = None
+
+class BulkOrderStatusUpdate(OrderStatusUpdate):
+    order_ids: List[str] = Field(..., min_length=1, max_length=5000)
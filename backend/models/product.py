@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List
+
+class Product(BaseModel):
+    id: int
+    name: str
+    category: str  # pantalon, sueter, medias
+    price: float
+    image: str
+    description: str = ""
+    sizes: List[str]
+    inStock: bool = True
@@ -0,0 +1,49 @@
+import re
+import unicodedata
+from typing import List, Optional
+
+# Normalización de los datos del cliente para la búsqueda de soporte: se aplica
+# igual al guardar la orden (`search`) y a los criterios de búsqueda
+
+
+def normalize_email(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+def normalize_phone(value: Optional[str]) -> str:
+    """
+    Sólo dígitos y sin el código de país 1: "+1 (809) 555-0101" -> "8095550101"
+    """
+    digits = re.sub(r"\D", "", value or "")
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits
+
+
+def normalize_document(value: Optional[str]) -> str:
+    """
+    DNI, RNC o pasaporte sin guiones ni espacios y en mayúsculas
+    """
+    return re.sub(r"[^0-9A-Za-z]", "", value or "").upper()
+
+
+def name_words(value: Optional[str]) -> List[str]:
+    """
+    Palabras del nombre en minúsculas y sin tildes: "María Pérez" -> ["maria", "perez"]
+    """
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    plain = "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+    return list(dict.fromkeys(re.findall(r"[0-9a-z]+", plain)))
+
+
+def search_keys(customer: dict) -> dict:
+    """
+    Documento `search` de una orden a partir de los datos del cliente
+    """
+    phones = [normalize_phone(customer.get(field)) for field in ("telefono", "whatsapp")]
+    return {
+        "email": normalize_email(customer.get("email")),
+        "phones": list(dict.fromkeys(phone for phone in phones if phone)),
+        "document": normalize_document(customer.get("dni_rnc")),
+        "name_words": name_words(customer.get("nombre")),
+    }
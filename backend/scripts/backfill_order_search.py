@@ -0,0 +1,79 @@
+"""
+Rellena el campo `search` (email, teléfonos, documento y palabras del nombre
+normalizados) en las órdenes creadas antes de la búsqueda de soporte.
+
+Trabaja por lotes en orden de _id con `bulk_write` y sólo toca órdenes que
+aún no tienen `search`, así que puede interrumpirse y volver a ejecutarse.
+Con `--rebuild` recalcula también las que ya lo tienen (por ejemplo, tras
+cambiar la normalización).
+
+Uso (desde backend/):
+    python -m scripts.backfill_order_search [--batch-size 1000] [--rebuild] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from models.search import search_keys
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+async def backfill(db, batch_size: int, rebuild: bool = False, dry_run: bool = False):
+    pending = {} if rebuild else {"search": {"$exists": False}}
+    remaining = await db.orders.count_documents(pending)
+    print(f"Órdenes por actualizar: {remaining}")
+
+    started = time.monotonic()
+    done = 0
+    updated = 0
+    query = pending
+    while True:
+        batch = await db.orders.find(query, {"customer": 1}).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        requests = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"search": search_keys(doc.get("customer") or {})}})
+            for doc in batch
+        ]
+        if not dry_run:
+            result = await db.orders.bulk_write(requests, ordered=False)
+            updated += result.modified_count
+        done += len(batch)
+
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed else 0
+        print(f"  {done}/{remaining} ({done * 100 // max(remaining, 1)}%) - {rate:,.0f} docs/s")
+        last_id = batch[-1]["_id"]
+        query = {"$and": [pending, {"_id": {"$gt": last_id}}]} if pending else {"_id": {"$gt": last_id}}
+
+    print(f"Búsqueda rellenada en {updated} órdenes")
+
+
+async def main_async(batch_size: int, rebuild: bool, dry_run: bool):
+    load_dotenv(ROOT_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        await backfill(client[os.environ['DB_NAME']], batch_size, rebuild, dry_run)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rellena los campos de búsqueda de las órdenes")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--rebuild", action="store_true", help="recalcular también las que ya lo tienen")
+    parser.add_argument("--dry-run", action="store_true", help="recorrer sin escribir")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.batch_size, args.rebuild, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
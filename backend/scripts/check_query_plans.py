@@ -0,0 +1,57 @@
+"""
+Verifica que ninguna consulta de la API recorra la colección completa ni ordene
+en memoria.
+
+Ejecuta `explain()` sobre cada forma registrada en `services.indexes.QUERY_SHAPES`
+contra la base de datos configurada en backend/.env y termina con código 1 si
+alguna usa COLLSCAN u ordena en memoria (SORT) sin que la forma lo admita.
+
+Uso (desde backend/):
+    python -m scripts.check_query_plans [--ensure-indexes]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.indexes import QUERY_SHAPES, ensure_indexes, explain_query_shape, plan_problems
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+async def check(ensure: bool) -> int:
+    load_dotenv(ROOT_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    failures = 0
+    try:
+        if ensure:
+            await ensure_indexes(db)
+        for shape in QUERY_SHAPES:
+            stages = await explain_query_shape(db, shape)
+            problems = plan_problems(shape, stages)
+            failures += bool(problems)
+            status = f"FAIL ({', '.join(problems)})" if problems else "OK"
+            print(f"{status:<18} {shape.name:<28} {' <- '.join(stages)}")
+    finally:
+        client.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica los planes de consulta de la API")
+    parser.add_argument("--ensure-indexes", action="store_true", help="crear los índices antes de verificar")
+    args = parser.parse_args()
+
+    failures = asyncio.run(check(args.ensure_indexes))
+    if failures:
+        print(f"{failures} consulta(s) sin un índice adecuado")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
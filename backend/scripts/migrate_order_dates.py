@@ -0,0 +1,107 @@
+"""
+Convierte created_at/updated_at de las órdenes guardadas como texto ISO a
+fechas nativas de BSON.
+
+La migración trabaja por lotes en orden de _id con `bulk_write` y guarda su
+avance en la colección `migrations`, de modo que puede interrumpirse y
+volver a ejecutarse: sólo procesa documentos que aún tienen fechas en texto.
+
+Uso (desde backend/):
+    python -m scripts.migrate_order_dates [--batch-size 1000] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+ROOT_DIR = Path(__file__).parent.parent
+MIGRATION_ID = "orders_native_datetimes"
+DATE_FIELDS = ("created_at", "updated_at")
+STRING_DATES = {"$or": [{field: {"$type": "string"}} for field in DATE_FIELDS]}
+
+
+def _parse(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+async def migrate(db, batch_size: int, dry_run: bool = False):
+    state = await db.migrations.find_one({"_id": MIGRATION_ID}) or {}
+    last_id = state.get("last_id")
+    migrated = state.get("migrated", 0)
+
+    query = dict(STRING_DATES)
+    if last_id is not None:
+        query = {"$and": [STRING_DATES, {"_id": {"$gt": last_id}}]}
+    remaining = await db.orders.count_documents(query)
+    print(f"Órdenes por migrar: {remaining} (ya migradas: {migrated})")
+
+    started = time.monotonic()
+    done = 0
+    projection = {field: 1 for field in DATE_FIELDS}
+    while True:
+        batch = await db.orders.find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        requests = []
+        for doc in batch:
+            updates = {field: _parse(doc[field]) for field in DATE_FIELDS if isinstance(doc.get(field), str)}
+            if updates:
+                # Se condiciona al valor leído para no pisar escrituras concurrentes
+                guard = {"_id": doc["_id"], **{field: doc[field] for field in updates}}
+                requests.append(UpdateOne(guard, {"$set": updates}))
+
+        if requests and not dry_run:
+            result = await db.orders.bulk_write(requests, ordered=False)
+            migrated += result.modified_count
+        done += len(batch)
+        last_id = batch[-1]["_id"]
+        if not dry_run:
+            await db.migrations.update_one(
+                {"_id": MIGRATION_ID},
+                {"$set": {"last_id": last_id, "migrated": migrated, "updated_at": datetime.utcnow()}},
+                upsert=True,
+            )
+
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed else 0
+        print(f"  {done}/{remaining} ({done * 100 // max(remaining, 1)}%) - {rate:,.0f} docs/s")
+        query = {"$and": [STRING_DATES, {"_id": {"$gt": last_id}}]}
+
+    if not dry_run:
+        # Al terminar se reinicia el avance: otra ejecución vuelve a buscar desde el
+        # principio órdenes que aún tengan fechas en texto
+        await db.migrations.update_one(
+            {"_id": MIGRATION_ID},
+            {"$set": {"last_id": None, "completed_at": datetime.utcnow()}},
+        )
+    print(f"Migración terminada: {migrated} órdenes convertidas")
+
+
+async def main_async(batch_size: int, dry_run: bool):
+    load_dotenv(ROOT_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        await migrate(client[os.environ['DB_NAME']], batch_size, dry_run)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra las fechas de las órdenes a fechas nativas")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="recorrer sin escribir")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
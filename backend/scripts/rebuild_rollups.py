@@ -0,0 +1,48 @@
+"""
+Recalcula desde cero los acumulados de ventas (`sales_rollups`) a partir de
+la colección de órdenes.
+
+Los acumulados nuevos se construyen en una colección temporal que reemplaza a
+la actual al terminar. Las órdenes creadas mientras corre el recálculo pueden
+quedar fuera, así que conviene ejecutarlo en horas de poco tráfico.
+
+Uso (desde backend/):
+    python -m scripts.rebuild_rollups [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.analytics import SalesRollups
+from services.indexes import INDEXES
+from services.settings import Settings
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+async def rebuild(batch_size: int):
+    load_dotenv(ROOT_DIR / '.env')
+    settings = Settings.from_env()
+    client = AsyncIOMotorClient(settings.mongo_url)
+    try:
+        started = time.monotonic()
+        rollups = SalesRollups(client[settings.db_name], settings.store_tzinfo)
+        count = await rollups.rebuild(batch_size, indexes=INDEXES["sales_rollups"])
+        print(f"Acumulados recalculados a partir de {count} órdenes en {time.monotonic() - started:.1f}s")
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula los acumulados de ventas")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
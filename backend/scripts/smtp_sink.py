@@ -0,0 +1,72 @@
+"""
+Servidor SMTP local que acepta y descarta emails, para desarrollo y pruebas.
+
+Uso (desde backend/):
+    python -m scripts.smtp_sink --port 1025
+
+y en backend/.env:
+    SMTP_HOST=localhost
+    SMTP_PORT=1025
+    SMTP_USE_TLS=false
+
+Al salir muestra cuántas sesiones y mensajes recibió, lo que permite
+comprobar que el pool de EmailService reutiliza las sesiones SMTP.
+"""
+import argparse
+import asyncio
+import logging
+
+from aiosmtpd.controller import Controller
+
+logger = logging.getLogger("smtp_sink")
+
+
+class SinkHandler:
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+        self.sessions = 0
+        self.messages = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        if self.verbose:
+            logger.info(f"Email de {envelope.mail_from} para {', '.join(envelope.rcpt_tos)} ({len(envelope.content)} bytes)")
+        return "250 Message accepted for delivery"
+
+
+def start_sink(host: str = "127.0.0.1", port: int = 1025, verbose: bool = False) -> Controller:
+    """
+    Arranca el servidor en un hilo propio y devuelve su controlador
+    """
+    controller = Controller(SinkHandler(verbose), hostname=host, port=port)
+    controller.start()
+    return controller
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor SMTP local para pruebas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    controller = start_sink(args.host, args.port, verbose=not args.quiet)
+    logger.info(f"SMTP sink escuchando en {args.host}:{args.port}")
+    try:
+        asyncio.run(asyncio.Event().wait())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.stop()
+        handler = controller.handler
+        logger.info(f"Sesiones: {handler.sessions}, mensajes: {handler.messages}")
+
+
+if __name__ == "__main__":
+    main()
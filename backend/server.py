@@ -1,43 +1,49 @@
-from fastapi import FastAPI, APIRouter, HTTPException
-from dotenv import load_dotenv
+from fastapi import FastAPI, APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+import json
 import logging
+import secrets
+from contextlib import asynccontextmanager
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, Field, ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from typing import Any, Dict, List, Optional
 import uuid
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 
 # Import our models and services
-from models.order import Order, OrderCreate
-from services.email_service import EmailService
+from models.order import BulkOrderStatusUpdate, Order, OrderCreate, OrderStatusUpdate, STATUS_TRANSITIONS
+from models.product import Product
+from services.analytics import DIMENSION_DAY, DIMENSIONS
+from services.catalog import CatalogError
+from services.container import AppServices
+from services.email_service import EMAIL_CUSTOMER_CONFIRMATION
+from services.export import stream_csv, stream_ndjson
+from services.idempotency import STATUS_COMPLETED
+from services.metrics import PrometheusMiddleware, render_metrics
+from services.order_events import stream_events
+from services.order_search import InvalidSearch, search_filter
+from services.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+from services.serialization import MongoJSONResponse
+from services.settings import Settings
+from services.views import InvalidFields, order_projection
 
 ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
-
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
-# Initialize services
-email_service = EmailService()
-
-# Create the main app without a prefix
-app = FastAPI()
 
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", default_response_class=MongoJSONResponse)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+def get_services(request: Request) -> AppServices:
+    """
+    Cliente de MongoDB y servicios del proceso, creados en el lifespan
+    """
+    return request.app.state.services
+
 # Define Models for existing endpoints
 class StatusCheck(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -53,108 +59,706 @@ async def root():
     return {"message": "Air Store API - Ready to serve!"}
 
 @api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
+async def create_status_check(input: StatusCheckCreate, services: AppServices = Depends(get_services)):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    await services.status_store.record(status_obj.dict())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    services: AppServices = Depends(get_services),
+):
+    """
+    Status checks del más reciente al más antiguo; la siguiente página se pide
+    con el cursor de la cabecera X-Next-Cursor
+    """
+    try:
+        status_checks, next_cursor = await services.status_store.page(limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return MongoJSONResponse(status_checks, headers=headers)
+
+@api_router.get("/status/summary")
+async def get_status_summary(window: int = Query(24, ge=1, le=168), services: AppServices = Depends(get_services)):
+    """
+    Última vez visto y checks por cliente en las últimas `window` horas
+    """
+    return MongoJSONResponse(await services.status_store.summary(window))
 
 # NEW ORDER ENDPOINTS
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Si el cliente ya tiene esta versión: If-None-Match (lista de ETags o `*`)
+    o, si no la envía, If-Modified-Since
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            # Una fecha con zona `-0000` llega sin tzinfo; se toma como UTC
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+def cached_json(request: Request, body: bytes, etag: str) -> Response:
+    """
+    Respuesta JSON ya serializada con ETag; 304 si el cliente tiene la misma versión
+    """
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def require_admin(
+    authorization: Optional[str] = Header(None),
+    services: AppServices = Depends(get_services),
+):
+    """
+    Exige `Authorization: Bearer <ADMIN_TOKEN>`; sin ADMIN_TOKEN configurado
+    las escrituras quedan deshabilitadas
+    """
+    admin_token = services.settings.admin_token
+    if admin_token is None:
+        raise HTTPException(status_code=403, detail="Escrituras de administración deshabilitadas")
+    scheme, _, token = (authorization or "").partition(" ")
+    expected = admin_token.get_secret_value().encode()
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.strip().encode(), expected):
+        raise HTTPException(
+            status_code=401,
+            detail="Token de administración inválido",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+@api_router.get("/products")
+async def get_products(request: Request, services: AppServices = Depends(get_services)):
+    """
+    Catálogo de productos (servido desde memoria)
+    """
+    snapshot = await services.product_catalog.snapshot()
+    return cached_json(request, snapshot.body, snapshot.etag)
+
+@api_router.get("/products/{product_id}")
+async def get_product(product_id: int, request: Request, services: AppServices = Depends(get_services)):
+    snapshot = await services.product_catalog.snapshot()
+    if product_id not in snapshot.products:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    return cached_json(request, snapshot.product_bodies[product_id], snapshot.product_etags[product_id])
+
+@api_router.put("/products/{product_id}", response_model=Product, dependencies=[Depends(require_admin)])
+async def save_product(product_id: int, product: Product, services: AppServices = Depends(get_services)):
+    """
+    Crear o reemplazar un producto del catálogo (requiere el token de administración)
+    """
+    if product.id != product_id:
+        raise HTTPException(status_code=400, detail="El id del producto no coincide con la URL")
+    await services.product_catalog.save(product)
+    return product
+
+@api_router.delete("/products/{product_id}", dependencies=[Depends(require_admin)])
+async def delete_product(product_id: int, services: AppServices = Depends(get_services)):
+    if not await services.product_catalog.delete(product_id):
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    return {"deleted": product_id}
+
 @api_router.post("/orders")
-async def create_order(order_data: OrderCreate):
+async def create_order(
+    order_data: OrderCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    services: AppServices = Depends(get_services),
+):
     """
-    Crear nueva orden y enviar notificación por email
+    Crear nueva orden y encolar las notificaciones por email.
+
+    Con la cabecera `Idempotency-Key`, los reintentos de una misma orden
+    devuelven la respuesta guardada sin crearla ni notificarla otra vez.
     """
+    # Identifica esta petición como dueña de la reserva de la clave
+    request_id = str(uuid.uuid4())
+    if idempotency_key:
+        previous = await services.idempotency_store.reserve(idempotency_key, request_id)
+        if previous is not None:
+            if previous["status"] == STATUS_COMPLETED:
+                response.headers["Idempotent-Replayed"] = "true"
+                return previous["response"]
+            raise HTTPException(status_code=409, detail="Ya hay una petición en curso con esta Idempotency-Key")
+    
     try:
-        # Crear objeto Order
-        order = Order(
-            customer=order_data.customer,
-            shipping=order_data.shipping,
-            payment=order_data.payment,
-            items=order_data.items
+        # Precios, nombres e imágenes salen del catálogo, no del cliente
+        try:
+            items = await services.product_catalog.price_items(order_data.items)
+        except CatalogError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        payment = order_data.payment.model_copy(update={
+            "total": round(sum(item.price * item.quantity for item in items), 2)
+        })
+        
+        # Crear objeto Order (sus partes ya están validadas)
+        order = Order.from_create(
+            order_data,
+            order_number=await services.order_numbers.next_number(),
+            payment=payment,
+            items=items
         )
         
-        # Guardar en base de datos
-        order_dict = order.dict()
-        result = await db.orders.insert_one(order_dict)
+        # Guardar en base de datos, con los emails pendientes en la misma
+        # escritura: si el proceso cae antes de encolarlos, el worker los recupera
+        order_dict = services.email_outbox.mark_pending(order.to_document())
+        result = await services.db.orders.insert_one(order_dict)
         
         if not result.inserted_id:
             raise HTTPException(status_code=500, detail="Error guardando la orden")
         
-        # Enviar email de notificación a chantella.off@gmail.com
-        notification_sent = email_service.send_order_notification(order)
+        await record_sales(services, [order_dict])
+        services.order_events.order_created(order_dict)
         
-        # Enviar confirmación al cliente
-        confirmation_sent = email_service.send_customer_confirmation(order)
+        # Encolar notificación a chantella.off@gmail.com y confirmación al cliente;
+        # el worker de email las envía fuera de la petición
+        emails_queued = True
+        try:
+            await services.email_outbox.enqueue_order(order)
+        except Exception as e:
+            emails_queued = False
+            logger.error(f"Error encolando emails de la orden {order.order_number}, se reintentará desde el barrido: {str(e)}")
         
-        logger.info(f"Orden creada: {order.order_number}, Email notificación: {notification_sent}, Email confirmación: {confirmation_sent}")
+        logger.info(f"Orden creada: {order.order_number}, Emails encolados: {emails_queued}")
         
-        return {
+        order_response = {
             "order_id": order.order_number,
             "status": "confirmed",
             "message": "Orden creada exitosamente",
-            "notification_sent": notification_sent,
-            "confirmation_sent": confirmation_sent
+            "emails_queued": emails_queued
         }
         
+    except HTTPException:
+        if idempotency_key:
+            await services.idempotency_store.release(idempotency_key, request_id)
+        raise
     except Exception as e:
         logger.error(f"Error creando orden: {str(e)}")
+        if idempotency_key:
+            await services.idempotency_store.release(idempotency_key, request_id)
         raise HTTPException(status_code=500, detail=f"Error procesando la orden: {str(e)}")
+    
+    if idempotency_key:
+        await services.idempotency_store.complete(idempotency_key, request_id, order_response)
+    return order_response
+
+async def record_sales(services: AppServices, order_docs):
+    """
+    Suma órdenes recién guardadas a los acumulados de ventas; si falla, se
+    recuperan con `python -m scripts.rebuild_rollups`
+    """
+    try:
+        await services.sales_rollups.record(order_docs)
+    except Exception as e:
+        logger.error(f"Error actualizando acumulados de ventas: {str(e)}")
+
+BULK_MAX_ORDERS = 10000
+BULK_INSERT_CHUNK = 1000
+
+def bulk_order_errors(order_data: OrderCreate) -> List[dict]:
+    """
+    Importes que el lote rechaza aunque pasen el modelo: se conservan los
+    precios del marketplace, pero no cantidades ni importes negativos
+    """
+    errors = []
+    for position, item in enumerate(order_data.items):
+        if item.quantity < 1:
+            errors.append({"loc": ["items", position, "quantity"], "msg": "La cantidad debe ser al menos 1"})
+        if item.price < 0:
+            errors.append({"loc": ["items", position, "price"], "msg": "El precio no puede ser negativo"})
+    if order_data.payment.total < 0:
+        errors.append({"loc": ["payment", "total"], "msg": "El total no puede ser negativo"})
+    return errors
+
+@api_router.post("/orders/bulk", dependencies=[Depends(require_admin)])
+async def create_orders_bulk(
+    payloads: List[Dict[str, Any]] = Body(...),
+    notify_customers: bool = False,
+    services: AppServices = Depends(get_services),
+):
+    """
+    Importar órdenes en lote (marketplace, Instagram).
+
+    Cada orden se valida por separado y los errores se reportan por índice;
+    la tienda recibe un solo email de resumen en lugar de uno por orden.
+    Requiere el token de administración.
+    """
+    if len(payloads) > BULK_MAX_ORDERS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BULK_MAX_ORDERS} órdenes por lote")
+    
+    errors = []
+    valid = []
+    positions = []
+    for index, payload in enumerate(payloads):
+        try:
+            order_data = OrderCreate.model_validate(payload)
+        except ValidationError as e:
+            errors.append({"index": index, "errors": json.loads(e.json(include_url=False))})
+            continue
+        order_errors = bulk_order_errors(order_data)
+        if order_errors:
+            errors.append({"index": index, "errors": order_errors})
+            continue
+        valid.append(order_data)
+        positions.append(index)
+    
+    # Un solo bloque de números de orden para todo el lote
+    numbers = await services.order_numbers.next_numbers(len(valid)) if valid else []
+    orders = [
+        Order.from_create(order_data, order_number=number)
+        for order_data, number in zip(valid, numbers)
+    ]
+    
+    inserted = []
+    for start in range(0, len(orders), BULK_INSERT_CHUNK):
+        chunk = orders[start:start + BULK_INSERT_CHUNK]
+        chunk_docs = [order.to_document() for order in chunk]
+        failed = {}
+        try:
+            await services.db.orders.insert_many(chunk_docs, ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"]: error.get("errmsg", "Error guardando la orden") for error in e.details["writeErrors"]}
+        except Exception as e:
+            logger.error(f"Error guardando lote de órdenes: {str(e)}")
+            failed = {offset: "Error guardando la orden" for offset in range(len(chunk))}
+        for offset, order in enumerate(chunk):
+            index = positions[start + offset]
+            if offset in failed:
+                errors.append({"index": index, "errors": [{"msg": failed[offset]}]})
+            else:
+                inserted.append({"index": index, "order_id": order.order_number})
+        await record_sales(services, (doc for offset, doc in enumerate(chunk_docs) if offset not in failed))
+        for offset, doc in enumerate(chunk_docs):
+            if offset not in failed:
+                services.order_events.order_created(doc)
+    
+    order_numbers = [item["order_id"] for item in inserted]
+    emails_queued = True
+    try:
+        if order_numbers:
+            await services.email_outbox.enqueue_summary(order_numbers, "Importación de Órdenes")
+        if notify_customers:
+            await services.email_outbox.enqueue_orders(order_numbers, [EMAIL_CUSTOMER_CONFIRMATION])
+    except Exception as e:
+        emails_queued = False
+        logger.error(f"Error encolando emails de la importación: {str(e)}")
+    
+    errors.sort(key=lambda error: error["index"])
+    logger.info(f"Importación de órdenes: {len(inserted)} creadas, {len(errors)} con errores")
+    
+    return {
+        "received": len(payloads),
+        "inserted": len(inserted),
+        "failed": len(errors),
+        "orders": inserted,
+        "errors": errors,
+        "emails_queued": emails_queued
+    }
+
+def created_at_range(date_from: Optional[datetime], date_to: Optional[datetime]) -> dict:
+    """
+    Filtro por rango de created_at (fechas en UTC, `to` exclusivo)
+    """
+    bounds = {}
+    for op, value in (("$gte", date_from), ("$lt", date_to)):
+        if value is not None:
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            bounds[op] = value
+    return {"created_at": bounds} if bounds else {}
+
+@api_router.get("/orders/export")
+async def export_orders(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    status: Optional[str] = None,
+    batch_size: int = Query(500, ge=1, le=5000),
+    services: AppServices = Depends(get_services),
+):
+    """
+    Exportar órdenes en streaming como NDJSON o CSV
+    """
+    query = created_at_range(date_from, date_to)
+    if status:
+        query["status"] = status
+    
+    cursor = services.db.orders.find(query).sort([("created_at", 1), ("_id", 1)]).batch_size(batch_size)
+    
+    if format == "csv":
+        body, media_type = stream_csv(cursor), "text/csv; charset=utf-8"
+    else:
+        body, media_type = stream_ndjson(cursor), "application/x-ndjson"
+    filename = f"ordenes-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@api_router.get("/orders/events")
+async def order_events_feed(request: Request, services: AppServices = Depends(get_services)):
+    """
+    Feed en vivo de órdenes (Server-Sent Events): `order.created` y
+    `order.status_changed`. Sustituye al sondeo periódico de GET /api/orders;
+    si llega `dropped`, el cliente debe reconectar y recargar la lista.
+    """
+    subscription = services.order_events.broker.subscribe()
+    return StreamingResponse(
+        stream_events(subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/orders/search")
+async def search_orders(
+    email: Optional[str] = Query(None, max_length=254),
+    telefono: Optional[str] = Query(None, max_length=40),
+    dni_rnc: Optional[str] = Query(None, max_length=40),
+    nombre: Optional[str] = Query(None, max_length=200),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    services: AppServices = Depends(get_services),
+):
+    """
+    Buscar órdenes por email, teléfono, DNI/RNC (valor exacto, sin importar
+    formato) o por las palabras del nombre (la última puede estar incompleta),
+    de la más reciente a la más antigua
+    """
+    try:
+        query = search_filter(email=email, telefono=telefono, dni_rnc=dni_rnc, nombre=nombre)
+        if cursor:
+            query = {"$and": [query, keyset_filter(*decode_cursor(cursor))]}
+        projection = order_projection(view)
+        
+        orders = await services.db.orders.find(query, projection).sort(
+            [("created_at", -1), ("_id", -1)]
+        ).limit(limit + 1).to_list(limit + 1)
+    except (InvalidSearch, InvalidCursor) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error buscando órdenes: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error buscando las órdenes")
+    
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        last = orders[-1]
+        next_cursor = encode_cursor(last["created_at"], last["_id"])
+    
+    return MongoJSONResponse({
+        "orders": orders,
+        "limit": limit,
+        "next": next_cursor
+    })
+
+def order_validators(order: dict):
+    """
+    ETag y Last-Modified de una orden a partir de su updated_at
+    """
+    updated_at = order["updated_at"]
+    if isinstance(updated_at, str):
+        updated_at = datetime.fromisoformat(updated_at)
+    updated_at = updated_at.replace(tzinfo=timezone.utc) if updated_at.tzinfo is None else updated_at
+    etag = f'"{order["order_number"]}-{int(updated_at.timestamp() * 1000)}"'
+    return etag, updated_at
 
 @api_router.get("/orders/{order_id}")
-async def get_order(order_id: str):
+async def get_order(
+    order_id: str,
+    request: Request,
+    view: str = Query("full", pattern="^(summary|full)$"),
+    fields: Optional[str] = None,
+    services: AppServices = Depends(get_services),
+):
     """
     Obtener detalles de una orden específica
     """
     try:
-        order = await db.orders.find_one({"order_number": order_id})
+        projection = order_projection(view, fields)
+    except InvalidFields as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cached = view == "full" and not fields
+    try:
+        if cached:
+            # Las órdenes completas se sirven desde caché; varias peticiones
+            # simultáneas de la misma orden comparten una sola consulta
+            order = await services.order_cache.get_or_load(
+                order_id, lambda: services.db.orders.find_one({"order_number": order_id}, projection)
+            )
+        else:
+            order = await services.db.orders.find_one({"order_number": order_id}, projection)
         if not order:
             raise HTTPException(status_code=404, detail="Orden no encontrada")
         
-        return order
-        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error obteniendo orden {order_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Error obteniendo la orden")
+    
+    headers = None
+    if cached:
+        etag, last_modified = order_validators(order)
+        headers = {"ETag": etag, "Last-Modified": format_datetime(last_modified, usegmt=True)}
+        if not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers=headers)
+    
+    return MongoJSONResponse(order, headers=headers)
+
+def transition_sources(update: OrderStatusUpdate) -> List[str]:
+    """
+    Estados desde los que se permite pasar al estado pedido
+    """
+    sources = STATUS_TRANSITIONS[update.status]
+    if update.expected_status is not None:
+        sources = [update.expected_status] if update.expected_status in sources else []
+    if not sources:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Transición no permitida hacia '{update.status}'"
+        )
+    return list(sources)
+
+def status_change(status: str, change_id: Optional[str] = None) -> dict:
+    now = datetime.utcnow()
+    fields = {"status": status, "updated_at": now}
+    if change_id is not None:
+        # Marca de la operación que hizo el cambio, para leer qué órdenes cambió
+        fields["status_change_id"] = change_id
+    return {
+        "$set": fields,
+        "$push": {"status_history": {"status": status, "at": now}},
+    }
+
+@api_router.patch("/orders/status", dependencies=[Depends(require_admin)])
+async def update_orders_status(update: BulkOrderStatusUpdate, services: AppServices = Depends(get_services)):
+    """
+    Cambiar el estado de muchas órdenes en una sola operación (por ejemplo,
+    al entregar los envíos del día a Caribe Turs)
+    """
+    sources = transition_sources(update)
+    order_ids = list(dict.fromkeys(update.order_ids))
+    change_id = str(uuid.uuid4())
+    try:
+        result = await services.db.orders.update_many(
+            {"order_number": {"$in": order_ids}, "status": {"$in": sources}},
+            status_change(update.status, change_id)
+        )
+        updated, skipped, not_found = order_ids, [], []
+        if result.modified_count < len(order_ids):
+            # Sólo si algo no se actualizó se consulta cuáles y por qué; las que
+            # ya estaban en el estado pedido también cuentan como omitidas
+            current = await services.db.orders.find(
+                {"order_number": {"$in": order_ids}},
+                {"_id": 0, "order_number": 1, "status": 1, "status_change_id": 1}
+            ).to_list(None)
+            changed = {order["order_number"] for order in current if order.get("status_change_id") == change_id}
+            found = {order["order_number"] for order in current}
+            updated = [order_id for order_id in order_ids if order_id in changed]
+            skipped = [
+                {"order_number": order["order_number"], "status": order["status"]}
+                for order in current if order["order_number"] not in changed
+            ]
+            not_found = [order_id for order_id in order_ids if order_id not in found]
+    except Exception as e:
+        logger.error(f"Error actualizando estados de órdenes: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error actualizando las órdenes")
+    
+    for order_id in updated:
+        services.order_cache.invalidate(order_id)
+        services.order_events.status_changed(order_id, update.status)
+    
+    logger.info(f"{len(updated)} órdenes pasadas a {update.status}")
+    return {
+        "status": update.status,
+        "requested": len(order_ids),
+        "updated": len(updated),
+        "skipped": skipped,
+        "not_found": not_found
+    }
+
+@api_router.patch("/orders/{order_id}/status", dependencies=[Depends(require_admin)])
+async def update_order_status(order_id: str, update: OrderStatusUpdate, services: AppServices = Depends(get_services)):
+    """
+    Cambiar el estado de una orden si su estado actual lo permite
+    """
+    sources = transition_sources(update)
+    try:
+        order = await services.db.orders.find_one_and_update(
+            {"order_number": order_id, "status": {"$in": sources}},
+            status_change(update.status),
+            projection={"order_number": 1, "status": 1, "updated_at": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if order is None:
+            current = await services.db.orders.find_one({"order_number": order_id}, {"_id": 0, "status": 1})
+    except Exception as e:
+        logger.error(f"Error actualizando estado de la orden {order_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error actualizando la orden")
+    
+    if order is None:
+        if current is None:
+            raise HTTPException(status_code=404, detail="Orden no encontrada")
+        raise HTTPException(
+            status_code=409,
+            detail=f"La orden está en estado '{current['status']}' y no puede pasar a '{update.status}'"
+        )
+    
+    services.order_cache.invalidate(order_id)
+    services.order_events.status_changed(order_id, order["status"], order["updated_at"])
+    order.pop("_id", None)
+    return order
 
 @api_router.get("/orders")
-async def get_all_orders(limit: int = 50, skip: int = 0):
+async def get_all_orders(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    view: str = Query("full", pattern="^(summary|full)$"),
+    fields: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    services: AppServices = Depends(get_services),
+):
     """
-    Obtener todas las órdenes (para administración)
+    Obtener todas las órdenes (para administración), paginadas por cursor
     """
     try:
-        orders = await db.orders.find().skip(skip).limit(limit).sort("created_at", -1).to_list(limit)
-        total_orders = await db.orders.count_documents({})
+        projection = order_projection(view, fields)
+        query = created_at_range(date_from, date_to)
+        if cursor:
+            page = keyset_filter(*decode_cursor(cursor))
+            query = {"$and": [query, page]} if query else page
         
-        return {
+        # Se pide un documento extra para saber si hay otra página
+        orders = await services.db.orders.find(query, projection).sort(
+            [("created_at", -1), ("_id", -1)]
+        ).limit(limit + 1).to_list(limit + 1)
+        
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            last = orders[-1]
+            next_cursor = encode_cursor(last["created_at"], last["_id"])
+        
+        # Conteo aproximado a partir de los metadatos de la colección
+        total_orders = await services.db.orders.estimated_document_count()
+        
+        return MongoJSONResponse({
             "orders": orders,
             "total": total_orders,
-            "skip": skip,
-            "limit": limit
-        }
+            "limit": limit,
+            "next": next_cursor
+        })
         
+    except (InvalidCursor, InvalidFields) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error obteniendo órdenes: {str(e)}")
         raise HTTPException(status_code=500, detail="Error obteniendo las órdenes")
 
-# Include the router in the main app
-app.include_router(api_router)
+@api_router.get("/analytics")
+async def get_analytics(
+    dimension: str = Query(DIMENSION_DAY, pattern=f"^({'|'.join(DIMENSIONS)})$"),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    services: AppServices = Depends(get_services),
+):
+    """
+    Ventas, unidades y órdenes por día, provincia, producto/talla o método de pago
+    """
+    end = date_to or datetime.now(services.settings.store_tzinfo).date()
+    start = date_from or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="El rango de fechas es inválido")
+    try:
+        rows = await services.sales_rollups.query(dimension, start, end)
+    except Exception as e:
+        logger.error(f"Error obteniendo analíticas: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error obteniendo las analíticas")
+    
+    return {
+        "dimension": dimension,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "totals": {
+            "revenue": round(sum(row["revenue"] for row in rows), 2),
+            "units": sum(row["units"] for row in rows),
+        },
+        "rows": rows
+    }
+
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Crea la app de FastAPI.
 
-logger = logging.getLogger(__name__)
+    El cliente de MongoDB y los servicios se construyen en el lifespan, en
+    cada proceso worker, y la app sólo acepta tráfico después de precalentar
+    el pool. Con varios procesos:
+        uvicorn server:create_app --factory --workers 4
+        gunicorn server:app -k uvicorn.workers.UvicornWorker -w 4
+    """
+    if settings is None:
+        from dotenv import load_dotenv
+        load_dotenv(ROOT_DIR / '.env')
+        settings = Settings.from_env()
+
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        services = AppServices(settings)
+        app.state.services = services
+        try:
+            await services.start()
+            yield
+        finally:
+            await services.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+
+    # Include the router in the main app
+    app.include_router(api_router)
+    app.add_api_route("/metrics", metrics, include_in_schema=False)
+
+    app.add_middleware(PrometheusMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=settings.cors_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    return app
+
+def __getattr__(name: str):
+    """
+    `server:app` se construye al pedirlo (uvicorn, gunicorn), no al importar
+    el módulo: importar server no lee .env ni configura nada
+    """
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
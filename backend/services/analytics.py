@@ -0,0 +1,164 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timezone, tzinfo
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+DIMENSION_DAY = "day"
+DIMENSION_PROVINCIA = "provincia"
+DIMENSION_PRODUCT = "product"
+DIMENSION_METODO_PAGO = "metodo_pago"
+DIMENSIONS = (DIMENSION_DAY, DIMENSION_PROVINCIA, DIMENSION_PRODUCT, DIMENSION_METODO_PAGO)
+
+RollupKey = Tuple[str, str, str]
+
+
+def order_day(created_at, tz: tzinfo) -> str:
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.astimezone(tz).date().isoformat()
+
+
+def accumulate(totals: Dict[RollupKey, Dict[str, float]], order: dict, tz: tzinfo):
+    """
+    Suma una orden (documento de MongoDB) a los acumulados por dimensión y día
+    de la zona horaria `tz`
+    """
+    day = order_day(order["created_at"], tz)
+    revenue = order["payment"]["total"]
+    items = order.get("items", [])
+    units = sum(item["quantity"] for item in items)
+
+    for dimension, key in (
+        (DIMENSION_DAY, ""),
+        (DIMENSION_PROVINCIA, order["shipping"]["provincia"]),
+        (DIMENSION_METODO_PAGO, order["payment"]["metodo_pago"]),
+    ):
+        bucket = totals[(dimension, day, key)]
+        bucket["revenue"] += revenue
+        bucket["units"] += units
+        bucket["orders"] += 1
+
+    products = defaultdict(lambda: [0.0, 0])
+    for item in items:
+        product = products[f"{item['id']}|{item['selectedSize']}"]
+        product[0] += item["price"] * item["quantity"]
+        product[1] += item["quantity"]
+    for key, (product_revenue, product_units) in products.items():
+        bucket = totals[(DIMENSION_PRODUCT, day, key)]
+        bucket["revenue"] += product_revenue
+        bucket["units"] += product_units
+        bucket["orders"] += 1
+
+
+def _new_totals() -> Dict[RollupKey, Dict[str, float]]:
+    return defaultdict(lambda: {"revenue": 0.0, "units": 0, "orders": 0})
+
+
+def _rollup_id(dimension: str, day: str, key: str) -> str:
+    return f"{dimension}:{day}:{key}"
+
+
+class SalesRollups:
+    """
+    Acumulados de ventas por día y dimensión en la colección `sales_rollups`.
+
+    Cada orden incrementa sus documentos con `$inc` al crearse, de modo que
+    los reportes leen unos pocos documentos en lugar de todas las órdenes.
+    Los días se cuentan en la zona horaria de la tienda (`tz`).
+    """
+
+    def __init__(self, db, tz: tzinfo):
+        self.db = db
+        self.collection = db.sales_rollups
+        self.tz = tz
+
+    async def record(self, orders: Iterable[dict]):
+        """
+        Incrementa los acumulados con una o varias órdenes en una sola escritura
+        """
+        totals = _new_totals()
+        for order in orders:
+            accumulate(totals, order, self.tz)
+        if not totals:
+            return
+        requests = [
+            UpdateOne(
+                {"_id": _rollup_id(dimension, day, key)},
+                {
+                    "$inc": values,
+                    "$setOnInsert": {"dimension": dimension, "day": day, "key": key},
+                },
+                upsert=True,
+            )
+            for (dimension, day, key), values in totals.items()
+        ]
+        await self.collection.bulk_write(requests, ordered=False)
+
+    async def query(self, dimension: str, start: date, end: date) -> List[dict]:
+        """
+        Totales de una dimensión entre dos días (ambos incluidos)
+        """
+        cursor = self.collection.find(
+            {"dimension": dimension, "day": {"$gte": start.isoformat(), "$lte": end.isoformat()}},
+            {"_id": 0, "day": 1, "key": 1, "revenue": 1, "units": 1, "orders": 1},
+        )
+        docs = await cursor.to_list(None)
+
+        if dimension == DIMENSION_DAY:
+            rows = [
+                {"day": doc["day"], "revenue": round(doc["revenue"], 2), "units": doc["units"], "orders": doc["orders"]}
+                for doc in docs
+            ]
+            return sorted(rows, key=lambda row: row["day"])
+
+        grouped = defaultdict(lambda: {"revenue": 0.0, "units": 0, "orders": 0})
+        for doc in docs:
+            bucket = grouped[doc["key"]]
+            bucket["revenue"] += doc["revenue"]
+            bucket["units"] += doc["units"]
+            bucket["orders"] += doc["orders"]
+
+        rows = []
+        for key, values in grouped.items():
+            row = {"key": key, "revenue": round(values["revenue"], 2), "units": values["units"], "orders": values["orders"]}
+            if dimension == DIMENSION_PRODUCT:
+                product_id, _, size = key.partition("|")
+                row.update({"product_id": int(product_id), "selectedSize": size})
+            rows.append(row)
+        return sorted(rows, key=lambda row: row["revenue"], reverse=True)
+
+    async def rebuild(self, batch_size: int = 1000, indexes: Optional[list] = None) -> int:
+        """
+        Recalcula todos los acumulados desde la colección de órdenes.
+
+        Se escriben en una colección temporal que luego reemplaza a la actual.
+        """
+        totals = _new_totals()
+        count = 0
+        projection = {"created_at": 1, "payment": 1, "shipping.provincia": 1, "items": 1}
+        async for order in self.db.orders.find({}, projection).batch_size(batch_size):
+            accumulate(totals, order, self.tz)
+            count += 1
+
+        staging = self.db[f"{self.collection.name}_rebuild"]
+        await staging.drop()
+        if indexes:
+            await staging.create_indexes(indexes)
+        docs = [
+            {"_id": _rollup_id(dimension, day, key), "dimension": dimension, "day": day, "key": key, **values}
+            for (dimension, day, key), values in totals.items()
+        ]
+        for start in range(0, len(docs), batch_size):
+            await staging.insert_many(docs[start:start + batch_size], ordered=False)
+        if docs:
+            await staging.rename(self.collection.name, dropTarget=True)
+        else:
+            await self.collection.delete_many({})
+        logger.info(f"Acumulados de ventas recalculados a partir de {count} órdenes")
+        return count
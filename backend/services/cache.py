@@ -0,0 +1,82 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+_MISSING = object()
+
+
+class AsyncLRUCache:
+    """
+    Caché LRU en memoria con TTL y coalescencia de fallos (single-flight).
+
+    Si varias peticiones piden a la vez una clave que no está en caché, el
+    `loader` se ejecuta una sola vez en su propia tarea y todas esperan su
+    resultado; si una de ellas se cancela (cliente desconectado), la carga
+    sigue para las demás.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+        # Una carga en curso podría traer el valor anterior: no debe guardarse
+        self._in_flight.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._in_flight.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Devuelve el valor en caché o lo carga una sola vez; los None no se guardan
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(loader())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._loaded(key, done))
+        # Cancelar a quien espera no cancela la carga compartida
+        return await asyncio.shield(task)
+
+    def _loaded(self, key: Hashable, task: asyncio.Future):
+        if self._in_flight.get(key) is not task:
+            # Invalidada mientras cargaba: el valor puede ser el anterior
+            return
+        del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        value = task.result()
+        if value is not None:
+            self.set(key, value)
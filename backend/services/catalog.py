@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from models.order import OrderItem
+from models.product import Product
+
+logger = logging.getLogger(__name__)
+
+SEED_FILE = Path(__file__).parent.parent / "data" / "products.json"
+
+
+class CatalogError(ValueError):
+    pass
+
+
+class _Snapshot:
+    """
+    Copia inmutable del catálogo con sus respuestas ya serializadas
+    """
+
+    __slots__ = ("products", "body", "etag", "product_bodies", "product_etags", "loaded_at")
+
+    def __init__(self, products: List[dict]):
+        products = sorted(products, key=lambda product: product["id"])
+        self.products: Dict[int, dict] = {product["id"]: product for product in products}
+        self.body = json.dumps(products, ensure_ascii=False, separators=(",", ":")).encode()
+        self.etag = _etag(self.body)
+        self.product_bodies = {
+            product["id"]: json.dumps(product, ensure_ascii=False, separators=(",", ":")).encode()
+            for product in products
+        }
+        self.product_etags = {product_id: _etag(body) for product_id, body in self.product_bodies.items()}
+        self.loaded_at = time.monotonic()
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+class ProductCatalog:
+    """
+    Catálogo de productos de la colección `products` servido desde memoria.
+
+    El catálogo completo se carga una vez y se recarga al vencer el TTL o al
+    escribirse desde esta API; en estado estable las lecturas no van a MongoDB.
+    Con varios workers, los demás ven los cambios al vencer su TTL.
+    """
+
+    def __init__(self, db, ttl: float = 60.0):
+        self.collection = db.products
+        self.ttl = ttl
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = asyncio.Lock()
+
+    async def seed_if_empty(self):
+        """
+        Carga los productos iniciales de data/products.json si la colección está vacía
+        """
+        if await self.collection.estimated_document_count():
+            return
+        products = [Product(**product).dict() for product in json.loads(SEED_FILE.read_text())]
+        await self.collection.insert_many([{"_id": product["id"], **product} for product in products])
+        logger.info(f"Catálogo inicial cargado con {len(products)} productos")
+
+    async def snapshot(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+            return snapshot
+        # Una sola recarga aunque lleguen varias peticiones a la vez
+        async with self._lock:
+            if self._snapshot is snapshot:
+                products = await self.collection.find({}, {"_id": 0}).to_list(None)
+                self._snapshot = _Snapshot(products)
+            return self._snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+    async def save(self, product: Product):
+        await self.collection.replace_one({"_id": product.id}, {"_id": product.id, **product.dict()}, upsert=True)
+        self.invalidate()
+
+    async def delete(self, product_id: int) -> bool:
+        result = await self.collection.delete_one({"_id": product_id})
+        self.invalidate()
+        return result.deleted_count > 0
+
+    async def price_items(self, items: List[OrderItem]) -> List[OrderItem]:
+        """
+        Reemplaza nombre, precio e imagen de cada artículo por los del catálogo
+        """
+        products = (await self.snapshot()).products
+        priced = []
+        for item in items:
+            product = products.get(item.id)
+            if product is None:
+                raise CatalogError(f"Producto {item.id} no existe")
+            if not product["inStock"]:
+                raise CatalogError(f"{product['name']} está agotado")
+            if item.selectedSize not in product["sizes"]:
+                raise CatalogError(f"Talla {item.selectedSize} no disponible para {product['name']}")
+            if item.quantity < 1:
+                raise CatalogError(f"Cantidad inválida para {product['name']}")
+            priced.append(OrderItem(
+                id=item.id,
+                name=product["name"],
+                price=product["price"],
+                quantity=item.quantity,
+                selectedSize=item.selectedSize,
+                image=product["image"],
+            ))
+        return priced
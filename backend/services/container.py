@@ -0,0 +1,90 @@
+import asyncio
+import logging
+
+from services.analytics import SalesRollups
+from services.cache import AsyncLRUCache
+from services.catalog import ProductCatalog
+from services.email_service import EmailService
+from services.idempotency import IdempotencyStore
+from services.indexes import ensure_indexes
+from services.metrics import MongoCommandMetrics, monitor_event_loop_lag
+from services.order_events import OrderEventBroker, OrderEvents
+from services.order_numbers import OrderNumberGenerator
+from services.outbox import EmailOutbox
+from services.settings import Settings
+from services.status_checks import StatusCheckStore
+
+logger = logging.getLogger(__name__)
+
+
+class AppServices:
+    """
+    Cliente de MongoDB y servicios de la app.
+
+    Se construyen dentro del lifespan, es decir, en cada proceso worker
+    después del fork: ningún socket de MongoDB o SMTP se comparte entre
+    procesos.
+    """
+
+    def __init__(self, settings: Settings):
+        # Motor se importa aquí, en el lifespan, para que importar la app sea rápido
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        self.settings = settings
+        self.client = AsyncIOMotorClient(
+            settings.mongo_url,
+            event_listeners=[MongoCommandMetrics()],
+            **settings.mongo_client_options()
+        )
+        self.db = self.client[settings.db_name]
+        self.email_service = EmailService(settings.store_tzinfo)
+        self.idempotency_store = IdempotencyStore(self.db, lease_seconds=settings.idempotency_lease_seconds)
+        self.status_store = StatusCheckStore(self.db)
+        self.sales_rollups = SalesRollups(self.db, settings.store_tzinfo)
+        self.order_cache = AsyncLRUCache(max_size=settings.order_cache_size, ttl=settings.order_cache_ttl)
+        self.product_catalog = ProductCatalog(self.db, ttl=settings.catalog_cache_ttl)
+        self.order_numbers = OrderNumberGenerator(
+            self.db, settings.store_tzinfo, block_size=settings.order_number_block_size
+        )
+        self.email_outbox = EmailOutbox(
+            self.db,
+            self.email_service,
+            concurrency=settings.email_worker_concurrency,
+            digest_window=settings.owner_digest_window_seconds,
+            digest_max_orders=settings.owner_digest_max_orders,
+            digest_immediate_total=settings.owner_digest_immediate_total,
+        )
+        self.order_events = OrderEvents(
+            self.db,
+            OrderEventBroker(queue_size=settings.order_events_queue_size),
+            use_change_stream=settings.order_events_change_stream,
+            on_order_changed=self.order_cache.invalidate,
+        )
+        self._loop_lag_monitor = None
+
+    async def warm_up(self):
+        """
+        Abre conexiones del pool y carga el catálogo antes de aceptar tráfico
+        """
+        connections = max(self.settings.mongo_warmup_connections, self.settings.mongo_min_pool_size)
+        if connections:
+            # Cada ping concurrente ocupa una conexión distinta del pool
+            await asyncio.gather(*(self.client.admin.command("ping") for _ in range(connections)))
+        await self.product_catalog.snapshot()
+        logger.info(f"MongoDB listo ({connections} conexiones precalentadas)")
+
+    async def start(self):
+        await ensure_indexes(self.db)
+        await self.product_catalog.seed_if_empty()
+        await self.warm_up()
+        self.email_outbox.start()
+        self.order_events.start()
+        self._loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+
+    async def stop(self):
+        if self._loop_lag_monitor is not None:
+            self._loop_lag_monitor.cancel()
+        await self.email_outbox.stop()
+        await self.order_events.stop()
+        self.email_service.close()
+        self.client.close()
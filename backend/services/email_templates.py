@@ -0,0 +1,431 @@
+import html
+import re
+from datetime import datetime, timezone, tzinfo
+from typing import List, Optional
+
+from models.order import Order
+
+_PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+
+
+class CompiledTemplate:
+    """
+    Plantilla HTML con huecos `{{nombre}}` compilada una sola vez.
+
+    Al compilar, el HTML estático se convierte en una cadena de formato; al
+    renderizar sólo se rellenan los huecos con `str.format_map`.
+    """
+
+    __slots__ = ("source", "fields", "_format")
+
+    def __init__(self, source: str):
+        parts = _PLACEHOLDER.split(source)
+        statics = [part.replace("{", "{{").replace("}", "}}") for part in parts[0::2]]
+        self.source = source
+        self.fields = frozenset(parts[1::2])
+        self._format = "".join(
+            static + (f"{{{field}}}" if field else "")
+            for static, field in zip(statics, parts[1::2] + [""])
+        ).format_map
+
+    def render(self, values: dict) -> str:
+        return self._format(values)
+
+
+def _esc(value) -> str:
+    return html.escape(str(value), quote=True)
+
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def _local_time(moment: datetime, tz: tzinfo) -> datetime:
+    # Las fechas de las órdenes se guardan en UTC sin zona horaria
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(tz)
+
+
+def _optional_paragraph(label: str, value: Optional[str]) -> str:
+    return f"<p><strong>{label}:</strong> {_esc(value)}</p>" if value else ""
+
+
+# Plantillas compiladas al importar el módulo
+_OWNER_ITEM_ROW = CompiledTemplate("""
+            <tr style="border-bottom: 1px solid #e5e7eb;">
+                <td style="padding: 12px; vertical-align: top;">
+                    <img src="{{image}}" alt="{{name}}" style="width: 60px; height: 60px; object-fit: cover; border-radius: 8px;">
+                </td>
+                <td style="padding: 12px; vertical-align: top;">
+                    <strong>{{name}}</strong><br>
+                    <span style="color: #6b7280; font-size: 14px;">Talla: {{size}}</span>
+                </td>
+                <td style="padding: 12px; text-align: center; vertical-align: top;">{{quantity}}</td>
+                <td style="padding: 12px; text-align: right; vertical-align: top;">RD${{price}}</td>
+                <td style="padding: 12px; text-align: right; vertical-align: top; font-weight: bold;">RD${{line_total}}</td>
+            </tr>
+            """)
+
+_OWNER_NOTIFICATION = CompiledTemplate("""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>Nueva Orden Air Store</title>
+        </head>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; padding: 20px;">
+            
+            <div style="background: linear-gradient(135deg, #10b981, #059669); color: white; padding: 30px; border-radius: 10px; text-align: center; margin-bottom: 30px;">
+                <h1 style="margin: 0; font-size: 28px;">🛍️ Nueva Orden Recibida</h1>
+                <p style="margin: 10px 0 0 0; font-size: 18px;">Air Store</p>
+            </div>
+
+            <div style="background: #f9fafb; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+                <h2 style="color: #10b981; margin-top: 0;">📋 Detalles de la Orden</h2>
+                <p><strong>Número de Orden:</strong> {{order_number}}</p>
+                <p><strong>Fecha:</strong> {{fecha}}</p>
+                <p><strong>Estado:</strong> <span style="background: #10b981; color: white; padding: 4px 8px; border-radius: 4px; font-size: 12px;">CONFIRMADA</span></p>
+            </div>
+
+            <div style="background: #f9fafb; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+                <h2 style="color: #10b981; margin-top: 0;">👤 Información del Cliente</h2>
+                <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 15px;">
+                    <div>
+                        <p><strong>Nombre:</strong> {{nombre}}</p>
+                        <p><strong>Email:</strong> {{email}}</p>
+                        <p><strong>Teléfono:</strong> {{telefono}}</p>
+                    </div>
+                    <div>
+                        <p><strong>Documento:</strong> {{documento_tipo}} - {{dni_rnc}}</p>
+                        {{contacto_adicional}}
+                    </div>
+                </div>
+            </div>
+
+            <div style="background: #f9fafb; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+                <h2 style="color: #10b981; margin-top: 0;">🚚 Dirección de Envío</h2>
+                <p><strong>Provincia:</strong> {{provincia}}</p>
+                <p><strong>Ciudad:</strong> {{ciudad}}</p>
+                <p><strong>Dirección:</strong> {{direccion}}</p>
+                {{codigo_postal}}
+                {{referencias}}
+            </div>
+
+            <div style="background: #f9fafb; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+                <h2 style="color: #10b981; margin-top: 0;">🛒 Productos Ordenados</h2>
+                <table style="width: 100%; border-collapse: collapse; background: white; border-radius: 8px; overflow: hidden;">
+                    <thead>
+                        <tr style="background: #10b981; color: white;">
+                            <th style="padding: 12px; text-align: left;">Imagen</th>
+                            <th style="padding: 12px; text-align: left;">Producto</th>
+                            <th style="padding: 12px; text-align: center;">Cantidad</th>
+                            <th style="padding: 12px; text-align: right;">Precio Unit.</th>
+                            <th style="padding: 12px; text-align: right;">Total</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {{items_html}}
+                    </tbody>
+                </table>
+            </div>
+
+            <div style="background: #10b981; color: white; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+                <h2 style="margin-top: 0;">💳 Resumen de Pago</h2>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
+                    <span>Subtotal:</span>
+                    <span>RD${{subtotal}}</span>
+                </div>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
+                    <span>Envío (Caribe Turs):</span>
+                    <span style="color: #bbf7d0;">GRATIS</span>
+                </div>
+                <hr style="border: 1px solid rgba(255,255,255,0.3); margin: 15px 0;">
+                <div style="display: flex; justify-content: space-between; font-size: 20px; font-weight: bold;">
+                    <span>Total:</span>
+                    <span>RD${{total}}</span>
+                </div>
+                <p style="margin-top: 15px; margin-bottom: 0;"><strong>Método de Pago:</strong> {{metodo_pago}}</p>
+            </div>
+
+            <div style="background: #eff6ff; border: 2px solid #3b82f6; border-radius: 10px; padding: 20px; text-align: center;">
+                <h3 style="color: #1e40af; margin-top: 0;">📞 Próximos Pasos</h3>
+                <p style="margin-bottom: 0; color: #1e40af;">
+                    1. Contacta al cliente para confirmar la orden<br>
+                    2. Prepara los productos para envío<br>
+                    3. Coordina con Caribe Turs para la entrega
+                </p>
+            </div>
+
+            <div style="text-align: center; margin-top: 30px; padding: 20px; background: #f9fafb; border-radius: 10px;">
+                <p style="color: #6b7280; margin: 0;">Este email fue generado automáticamente por Air Store</p>
+                <p style="color: #6b7280; margin: 5px 0 0 0; font-size: 14px;">{{fecha_completa}}</p>
+            </div>
+
+        </body>
+        </html>
+        """)
+
+_CUSTOMER_ITEM_ROW = CompiledTemplate("""
+            <tr style="border-bottom: 1px solid #e5e7eb;">
+                <td style="padding: 12px; vertical-align: top;">
+                    <strong>{{name}}</strong><br>
+                    <span style="color: #6b7280; font-size: 14px;">Talla: {{size}}</span>
+                </td>
+                <td style="padding: 12px; text-align: center; vertical-align: top;">{{quantity}}</td>
+                <td style="padding: 12px; text-align: right; vertical-align: top; font-weight: bold;">RD${{line_total}}</td>
+            </tr>
+            """)
+
+_CUSTOMER_CONFIRMATION = CompiledTemplate("""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>Confirmación de Orden Air</title>
+        </head>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
+            
+            <div style="background: linear-gradient(135deg, #10b981, #059669); color: white; padding: 30px; border-radius: 10px; text-align: center; margin-bottom: 30px;">
+                <h1 style="margin: 0; font-size: 28px;">✅ Orden Confirmada</h1>
+                <p style="margin: 10px 0 0 0; font-size: 18px;">¡Gracias por tu compra!</p>
+            </div>
+
+            <div style="background: #f9fafb; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+                <h2 style="color: #10b981; margin-top: 0;">Hola {{nombre}},</h2>
+                <p>Tu orden ha sido recibida y confirmada exitosamente. A continuación encontrarás los detalles:</p>
+                
+                <p><strong>Número de Orden:</strong> {{order_number}}</p>
+                <p><strong>Fecha:</strong> {{fecha}}</p>
+            </div>
+
+            <div style="background: #f9fafb; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+                <h2 style="color: #10b981; margin-top: 0;">🛒 Productos Ordenados</h2>
+                <table style="width: 100%; border-collapse: collapse; background: white; border-radius: 8px; overflow: hidden;">
+                    <thead>
+                        <tr style="background: #10b981; color: white;">
+                            <th style="padding: 12px; text-align: left;">Producto</th>
+                            <th style="padding: 12px; text-align: center;">Cantidad</th>
+                            <th style="padding: 12px; text-align: right;">Total</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {{items_html}}
+                    </tbody>
+                </table>
+                
+                <div style="text-align: right; margin-top: 15px; padding-top: 15px; border-top: 2px solid #10b981;">
+                    <h3 style="color: #10b981; margin: 0;">Total: RD${{total}}</h3>
+                </div>
+            </div>
+
+            <div style="background: #eff6ff; border: 2px solid #3b82f6; border-radius: 10px; padding: 20px;">
+                <h3 style="color: #1e40af; margin-top: 0;">🚚 Información de Envío</h3>
+                <p style="color: #1e40af; margin-bottom: 0;">
+                    Tu orden será enviada mediante <strong>Caribe Turs</strong> a:<br>
+                    {{direccion}}, {{ciudad}}, {{provincia}}
+                </p>
+            </div>
+
+            <div style="text-align: center; margin-top: 30px; padding: 20px; background: #f9fafb; border-radius: 10px;">
+                <h3 style="color: #10b981; margin-top: 0;">¡Gracias por elegir Air!</h3>
+                <p style="color: #6b7280; margin: 0;">"Siéntete libre, siéntete en el aire con Air"</p>
+            </div>
+
+        </body>
+        </html>
+        """)
+
+
+_SUMMARY_ROW = CompiledTemplate("""
+            <tr style="border-bottom: 1px solid #e5e7eb;">
+                <td style="padding: 8px;">{{order_number}}</td>
+                <td style="padding: 8px;">{{nombre}}</td>
+                <td style="padding: 8px;">{{provincia}}</td>
+                <td style="padding: 8px; text-align: center;">{{units}}</td>
+                <td style="padding: 8px;">{{metodo_pago}}</td>
+                <td style="padding: 8px; text-align: right; font-weight: bold;">RD${{total}}</td>
+            </tr>
+            """)
+
+_ORDERS_SUMMARY = CompiledTemplate("""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>{{title}}</title>
+        </head>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; padding: 20px;">
+            
+            <div style="background: linear-gradient(135deg, #10b981, #059669); color: white; padding: 30px; border-radius: 10px; text-align: center; margin-bottom: 30px;">
+                <h1 style="margin: 0; font-size: 28px;">🛍️ {{title}}</h1>
+                <p style="margin: 10px 0 0 0; font-size: 18px;">Air Store</p>
+            </div>
+
+            <div style="background: #10b981; color: white; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
+                    <span>Órdenes:</span>
+                    <span>{{order_count}}</span>
+                </div>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
+                    <span>Unidades:</span>
+                    <span>{{units}}</span>
+                </div>
+                <hr style="border: 1px solid rgba(255,255,255,0.3); margin: 15px 0;">
+                <div style="display: flex; justify-content: space-between; font-size: 20px; font-weight: bold;">
+                    <span>Total:</span>
+                    <span>RD${{total}}</span>
+                </div>
+            </div>
+
+            <div style="background: #f9fafb; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+                <h2 style="color: #10b981; margin-top: 0;">📋 Órdenes</h2>
+                <table style="width: 100%; border-collapse: collapse; background: white; border-radius: 8px; overflow: hidden;">
+                    <thead>
+                        <tr style="background: #10b981; color: white;">
+                            <th style="padding: 8px; text-align: left;">Orden</th>
+                            <th style="padding: 8px; text-align: left;">Cliente</th>
+                            <th style="padding: 8px; text-align: left;">Provincia</th>
+                            <th style="padding: 8px; text-align: center;">Unidades</th>
+                            <th style="padding: 8px; text-align: left;">Pago</th>
+                            <th style="padding: 8px; text-align: right;">Total</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {{rows_html}}
+                    </tbody>
+                </table>
+                {{omitted}}
+            </div>
+
+            <div style="text-align: center; margin-top: 30px; padding: 20px; background: #f9fafb; border-radius: 10px;">
+                <p style="color: #6b7280; margin: 0;">Este email fue generado automáticamente por Air Store</p>
+                <p style="color: #6b7280; margin: 5px 0 0 0; font-size: 14px;">{{fecha_completa}}</p>
+            </div>
+
+        </body>
+        </html>
+        """)
+
+def render_order_notification(order: Order, tz: tzinfo) -> str:
+    """
+    Renderiza el email de notificación de nueva orden para la tienda, con la
+    hora de la orden en la zona horaria `tz`
+    """
+    placed_at = _local_time(order.created_at, tz)
+    customer = order.customer
+    shipping = order.shipping
+
+    render_row = _OWNER_ITEM_ROW.render
+    items_html = "".join(
+        render_row({
+            "image": _esc(item.image),
+            "name": _esc(item.name),
+            "size": _esc(item.selectedSize),
+            "quantity": item.quantity,
+            "price": _money(item.price),
+            "line_total": _money(item.price * item.quantity),
+        })
+        for item in order.items
+    )
+    subtotal = sum(item.price * item.quantity for item in order.items)
+
+    # Información de contacto adicional
+    contacto_adicional = ""
+    if customer.contacto_preferido == "whatsapp" and customer.whatsapp:
+        contacto_adicional = f"📱 WhatsApp: {customer.whatsapp}"
+    elif customer.contacto_preferido == "instagram" and customer.instagram:
+        contacto_adicional = f"📸 Instagram: @{customer.instagram}"
+
+    return _OWNER_NOTIFICATION.render({
+        "order_number": _esc(order.order_number),
+        "fecha": placed_at.strftime('%d/%m/%Y %H:%M'),
+        "fecha_completa": placed_at.strftime('%d/%m/%Y %H:%M:%S'),
+        "nombre": _esc(customer.nombre),
+        "email": _esc(customer.email),
+        "telefono": _esc(customer.telefono),
+        "documento_tipo": _esc(customer.documento_tipo.upper()),
+        "dni_rnc": _esc(customer.dni_rnc),
+        "contacto_adicional": _optional_paragraph("Contacto Adicional", contacto_adicional),
+        "provincia": _esc(shipping.provincia),
+        "ciudad": _esc(shipping.ciudad),
+        "direccion": _esc(shipping.direccion),
+        "codigo_postal": _optional_paragraph("Código Postal", shipping.codigo_postal),
+        "referencias": _optional_paragraph("Referencias", shipping.referencias),
+        "items_html": items_html,
+        "subtotal": _money(subtotal),
+        "total": _money(order.payment.total),
+        "metodo_pago": _esc(order.payment.metodo_pago),
+    })
+
+
+def render_customer_confirmation(order: Order, tz: tzinfo) -> str:
+    """
+    Renderiza el email de confirmación de orden para el cliente, con la hora
+    de la orden en la zona horaria `tz`
+    """
+    placed_at = _local_time(order.created_at, tz)
+    shipping = order.shipping
+
+    render_row = _CUSTOMER_ITEM_ROW.render
+    items_html = "".join(
+        render_row({
+            "name": _esc(item.name),
+            "size": _esc(item.selectedSize),
+            "quantity": item.quantity,
+            "line_total": _money(item.price * item.quantity),
+        })
+        for item in order.items
+    )
+
+    return _CUSTOMER_CONFIRMATION.render({
+        "nombre": _esc(order.customer.nombre),
+        "order_number": _esc(order.order_number),
+        "fecha": placed_at.strftime('%d/%m/%Y %H:%M'),
+        "items_html": items_html,
+        "total": _money(order.payment.total),
+        "direccion": _esc(shipping.direccion),
+        "ciudad": _esc(shipping.ciudad),
+        "provincia": _esc(shipping.provincia),
+    })
+
+
+def render_orders_summary(orders: List[dict], title: str, tz: tzinfo, max_rows: int = 200,
+                          now: Optional[datetime] = None) -> str:
+    """
+    Renderiza un resumen de varias órdenes (documentos de MongoDB) en una sola
+    tabla; la fecha de generación se muestra en la zona horaria `tz`
+    """
+    now = _local_time(now or datetime.utcnow(), tz)
+    total = 0.0
+    units = 0
+    rows = []
+    render_row = _SUMMARY_ROW.render
+    for index, order in enumerate(orders):
+        order_units = sum(item.get("quantity", 0) for item in order.get("items", ()))
+        order_total = order.get("payment", {}).get("total", 0)
+        total += order_total
+        units += order_units
+        if index < max_rows:
+            rows.append(render_row({
+                "order_number": _esc(order.get("order_number", "")),
+                "nombre": _esc(order.get("customer", {}).get("nombre", "")),
+                "provincia": _esc(order.get("shipping", {}).get("provincia", "")),
+                "units": order_units,
+                "metodo_pago": _esc(order.get("payment", {}).get("metodo_pago", "")),
+                "total": _money(order_total),
+            }))
+
+    omitted = len(orders) - len(rows)
+    return _ORDERS_SUMMARY.render({
+        "title": _esc(title),
+        "order_count": len(orders),
+        "units": units,
+        "total": _money(total),
+        "rows_html": "".join(rows),
+        "omitted": f'<p style="color: #6b7280;">… y {omitted} órdenes más</p>' if omitted else "",
+        "fecha_completa": now.strftime('%d/%m/%Y %H:%M:%S'),
+    })
@@ -0,0 +1,93 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator
+
+from services.serialization import dumps
+from services.views import INTERNAL_FIELDS
+
+CSV_COLUMNS = [
+    "order_number", "status", "created_at",
+    "nombre", "email", "telefono", "documento_tipo", "dni_rnc", "contacto_preferido",
+    "provincia", "ciudad", "direccion", "codigo_postal",
+    "metodo_pago", "total", "items_count", "units", "items",
+]
+
+
+# Excel interpreta como fórmula una celda que empieza por estos caracteres
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_safe(value):
+    """
+    Neutraliza con `'` los textos que una hoja de cálculo tomaría como fórmula
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def order_to_ndjson(order: dict) -> bytes:
+    order.pop("_id", None)
+    for field in INTERNAL_FIELDS:
+        order.pop(field, None)
+    return dumps(order) + b"\n"
+
+
+def order_to_csv_row(order: dict) -> list:
+    customer = order.get("customer", {})
+    shipping = order.get("shipping", {})
+    payment = order.get("payment", {})
+    items = order.get("items", [])
+    created_at = order.get("created_at")
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    row = [
+        order.get("order_number"), order.get("status"), created_at,
+        customer.get("nombre"), customer.get("email"), customer.get("telefono"),
+        customer.get("documento_tipo"), customer.get("dni_rnc"), customer.get("contacto_preferido"),
+        shipping.get("provincia"), shipping.get("ciudad"), shipping.get("direccion"), shipping.get("codigo_postal"),
+        payment.get("metodo_pago"), payment.get("total"),
+        len(items), sum(item.get("quantity", 0) for item in items),
+        "; ".join(f"{item.get('name')} ({item.get('selectedSize')}) x{item.get('quantity')}" for item in items),
+    ]
+    # Los datos del cliente llegan del checkout tal cual los escribió
+    return [csv_safe(value) for value in row]
+
+
+async def stream_ndjson(cursor, chunk_size: int = 100) -> AsyncIterator[bytes]:
+    """
+    Emite las órdenes del cursor como NDJSON, agrupando líneas por bloque
+    """
+    chunk = []
+    async for order in cursor:
+        chunk.append(order_to_ndjson(order))
+        if len(chunk) >= chunk_size:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+
+
+async def stream_csv(cursor, chunk_size: int = 100) -> AsyncIterator[str]:
+    """
+    Emite las órdenes del cursor como CSV (una fila por orden)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    # La cabecera sale antes de leer el primer lote
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    rows = 0
+    async for order in cursor:
+        writer.writerow(order_to_csv_row(order))
+        rows += 1
+        if rows >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if rows:
+        yield buffer.getvalue()
@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Las claves se borran solas pasado este tiempo (índice TTL sobre created_at)
+IDEMPOTENCY_TTL_SECONDS = 24 * 60 * 60
+# Plazo de una petición en curso para completar o liberar su clave; si el
+# worker cae antes, un reintento posterior la retoma
+IDEMPOTENCY_LEASE_SECONDS = 60
+
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_COMPLETED = "completed"
+
+
+class IdempotencyStore:
+    """
+    Registro de claves `Idempotency-Key` en la colección `idempotency_keys`.
+
+    La clave es el `_id` del documento, así que el índice único de `_id`
+    decide qué petición concurrente se queda con ella.
+    """
+
+    def __init__(self, db, lease_seconds: float = IDEMPOTENCY_LEASE_SECONDS):
+        self.collection = db.idempotency_keys
+        self.lease_seconds = lease_seconds
+
+    async def reserve(self, key: str, owner: str) -> Optional[dict]:
+        """
+        Reserva la clave para la petición `owner`.
+
+        Devuelve None si la reserva es suya (nueva, o retomada de una petición
+        que dejó vencer su plazo sin terminar), o el registro existente si la
+        clave ya se usó (en curso o completada).
+        """
+        now = datetime.utcnow()
+        lease = {
+            "status": STATUS_IN_PROGRESS,
+            "owner": owner,
+            "locked_until": now + timedelta(seconds=self.lease_seconds),
+        }
+        try:
+            previous = await self.collection.find_one_and_update(
+                {"_id": key},
+                {"$setOnInsert": {**lease, "created_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            # Otra petición con la misma clave insertó el documento a la vez
+            return await self.collection.find_one({"_id": key}) or {"status": STATUS_IN_PROGRESS}
+        if previous is None or previous["status"] != STATUS_IN_PROGRESS:
+            return previous
+
+        # Las reservas anteriores al plazo sólo tienen created_at
+        locked_until = previous.get("locked_until") or previous["created_at"] + timedelta(seconds=self.lease_seconds)
+        if locked_until > now:
+            return previous
+        # La petición anterior no terminó (worker caído o reiniciado): se retoma
+        # la clave si ninguna otra petición lo hizo antes
+        taken = await self.collection.find_one_and_update(
+            {"_id": key, "status": STATUS_IN_PROGRESS, "locked_until": previous.get("locked_until")},
+            {"$set": lease},
+        )
+        if taken is None:
+            return await self.collection.find_one({"_id": key}) or {"status": STATUS_IN_PROGRESS}
+        logger.warning(f"Clave de idempotencia {key} retomada tras vencer el plazo de la petición anterior")
+        return None
+
+    async def complete(self, key: str, owner: str, response: dict):
+        result = await self.collection.update_one(
+            {"_id": key, "owner": owner},
+            {"$set": {"status": STATUS_COMPLETED, "response": response, "completed_at": datetime.utcnow()},
+             "$unset": {"locked_until": ""}},
+        )
+        if not result.matched_count:
+            logger.warning(f"La clave de idempotencia {key} fue retomada por otra petición antes de completarse")
+
+    async def release(self, key: str, owner: str):
+        """
+        Libera una reserva cuya petición falló, para permitir reintentarla
+        """
+        try:
+            await self.collection.delete_one({"_id": key, "status": STATUS_IN_PROGRESS, "owner": owner})
+        except Exception as e:
+            logger.error(f"Error liberando la clave de idempotencia {key}: {str(e)}")
@@ -0,0 +1,228 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from services.idempotency import IDEMPOTENCY_TTL_SECONDS
+from services.outbox import PENDING_EMAILS_FIELD, PENDING_EMAILS_LOCK_FIELD, SENT_JOB_TTL_SECONDS, STATUS_SENT
+from services.order_search import SEARCH_DOCUMENT, SEARCH_EMAIL, SEARCH_NAME_WORDS, SEARCH_PHONES
+from services.status_checks import STATUS_CHECK_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Registro declarativo de índices por colección; se asegura al arrancar el backend
+INDEXES: Dict[str, List[IndexModel]] = {
+    "orders": [
+        IndexModel([("order_number", ASCENDING)], name="order_number_unique", unique=True),
+        # Incluye los campos del resumen para que el listado sea una consulta cubierta
+        IndexModel(
+            [
+                ("created_at", DESCENDING),
+                ("_id", DESCENDING),
+                ("order_number", ASCENDING),
+                ("customer.nombre", ASCENDING),
+                ("payment.total", ASCENDING),
+                ("status", ASCENDING),
+            ],
+            name="created_at_id_summary",
+        ),
+        # Sólo las órdenes con emails aún por revisar tienen la marca
+        IndexModel([(PENDING_EMAILS_FIELD, ASCENDING)], name="pending_emails_sparse", sparse=True),
+        # Búsqueda de soporte: valor normalizado + orden de la paginación
+        *[
+            IndexModel([(field, ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name=name)
+            for field, name in (
+                (SEARCH_EMAIL, "search_email_created_at"),
+                (SEARCH_PHONES, "search_phones_created_at"),
+                (SEARCH_DOCUMENT, "search_document_created_at"),
+                (SEARCH_NAME_WORDS, "search_name_words_created_at"),
+            )
+        ],
+    ],
+    "idempotency_keys": [
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS),
+    ],
+    "status_checks": [
+        IndexModel([("timestamp", ASCENDING)], name="timestamp_ttl", expireAfterSeconds=STATUS_CHECK_TTL_SECONDS),
+        IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp_id_desc"),
+    ],
+    "status_check_counts": [
+        IndexModel([("hour", ASCENDING)], name="hour_ttl", expireAfterSeconds=STATUS_CHECK_TTL_SECONDS),
+    ],
+    "sales_rollups": [
+        IndexModel([("dimension", ASCENDING), ("day", ASCENDING)], name="dimension_day"),
+    ],
+    "email_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until"),
+        # Barrido de emails pendientes: ¿tiene ya la orden su trabajo o su resumen?
+        IndexModel([("order_number", ASCENDING)], name="order_number"),
+        IndexModel([("order_numbers", ASCENDING)], name="order_numbers"),
+        IndexModel(
+            [("sent_at", ASCENDING)],
+            name="sent_at_ttl",
+            expireAfterSeconds=SENT_JOB_TTL_SECONDS,
+            partialFilterExpression={"status": STATUS_SENT},
+        ),
+    ],
+}
+
+
+class QueryShape(NamedTuple):
+    """
+    Forma de una consulta que emite la API, usada para verificar su plan
+    """
+    name: str
+    collection: str
+    filter: dict
+    sort: Optional[list] = None
+    limit: int = 0
+    projection: Optional[dict] = None
+    # Se admite ordenar en memoria cuando el conjunto a ordenar es pequeño
+    allow_blocking_sort: bool = False
+
+
+# Consultas que emite la API; cada una debe resolverse con un índice que
+# también dé el orden pedido
+QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("get_order", "orders", {"order_number": "AIR-00000000-000000"}),
+    QueryShape("get_all_orders", "orders", {}, sort=[("created_at", DESCENDING), ("_id", DESCENDING)], limit=51),
+    QueryShape(
+        "get_all_orders_summary",
+        "orders",
+        {},
+        sort=[("created_at", DESCENDING), ("_id", DESCENDING)],
+        limit=51,
+        projection={"order_number": 1, "customer.nombre": 1, "payment.total": 1, "status": 1, "created_at": 1},
+    ),
+    QueryShape(
+        "get_all_orders_next_page",
+        "orders",
+        {
+            "$or": [
+                {"created_at": {"$lt": datetime(2000, 1, 1)}},
+                {"created_at": datetime(2000, 1, 1), "_id": {"$lt": ObjectId("000000000000000000000000")}},
+            ]
+        },
+        sort=[("created_at", DESCENDING), ("_id", DESCENDING)],
+        limit=51,
+    ),
+    QueryShape(
+        "get_all_orders_date_range",
+        "orders",
+        {"created_at": {"$gte": datetime(2000, 1, 1), "$lt": datetime(2001, 1, 1)}},
+        sort=[("created_at", DESCENDING), ("_id", DESCENDING)],
+        limit=51,
+    ),
+    *[
+        QueryShape(
+            f"search_orders_{name}",
+            "orders",
+            query,
+            sort=[("created_at", DESCENDING), ("_id", DESCENDING)],
+            limit=51,
+        )
+        for name, query in (
+            ("email", {SEARCH_EMAIL: "cliente@example.com"}),
+            ("phone", {SEARCH_PHONES: "8095550101"}),
+            ("document", {SEARCH_DOCUMENT: "00112345678"}),
+            ("name", {SEARCH_NAME_WORDS: "maria"}),
+            ("name_prefix", {"$and": [{SEARCH_NAME_WORDS: "maria"}, {SEARCH_NAME_WORDS: {"$regex": "^per"}}]}),
+        )
+    ],
+    QueryShape(
+        "export_orders",
+        "orders",
+        {"created_at": {"$gte": datetime(2000, 1, 1), "$lt": datetime(2001, 1, 1)}},
+        sort=[("created_at", ASCENDING), ("_id", ASCENDING)],
+    ),
+    QueryShape(
+        "analytics",
+        "sales_rollups",
+        {"dimension": "provincia", "day": {"$gte": "2000-01-01", "$lte": "2000-01-31"}},
+    ),
+    QueryShape("status_checks", "status_checks", {}, sort=[("timestamp", DESCENDING), ("_id", DESCENDING)], limit=101),
+    QueryShape("status_summary_counts", "status_check_counts", {"hour": {"$gte": datetime(2000, 1, 1)}}),
+    QueryShape(
+        "email_outbox_claim",
+        "email_outbox",
+        {
+            "$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": datetime(2000, 1, 1)}},
+                {"status": "processing", "locked_until": {"$lte": datetime(2000, 1, 1)}},
+            ]
+        },
+        sort=[("next_attempt_at", ASCENDING)],
+        # Sólo se ordenan los trabajos listos para enviar
+        allow_blocking_sort=True,
+    ),
+    QueryShape(
+        "email_outbox_sweep_orders",
+        "orders",
+        {PENDING_EMAILS_FIELD: {"$exists": True},
+         PENDING_EMAILS_LOCK_FIELD: {"$not": {"$gt": datetime(2000, 1, 1)}},
+         "created_at": {"$lte": datetime(2000, 1, 1)}},
+        limit=500,
+    ),
+    QueryShape(
+        "email_outbox_sweep_jobs",
+        "email_outbox",
+        {"$or": [{"order_number": {"$in": ["AIR-00000000-000000"]}},
+                 {"order_numbers": {"$in": ["AIR-00000000-000000"]}}]},
+    ),
+    QueryShape(
+        "email_outbox_digest_flush",
+        "email_outbox",
+        {"status": "collecting", "created_at": {"$lte": datetime(2000, 1, 1)}},
+    ),
+]
+
+
+async def ensure_indexes(db):
+    """
+    Crea los índices registrados que aún no existan (operación idempotente)
+    """
+    for collection, models in INDEXES.items():
+        names = await db[collection].create_indexes(models)
+        logger.info(f"Índices asegurados en {collection}: {', '.join(names)}")
+
+
+def _plan_stages(plan) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+def plan_problems(shape: QueryShape, stages: List[str]) -> List[str]:
+    """
+    Etapas del plan que la forma de consulta no admite: recorrer la colección
+    completa u ordenar en memoria (SORT bloqueante)
+    """
+    problems = ["COLLSCAN"] if "COLLSCAN" in stages else []
+    if "SORT" in stages and not shape.allow_blocking_sort:
+        problems.append("SORT")
+    return problems
+
+
+async def explain_query_shape(db, shape: QueryShape) -> List[str]:
+    """
+    Devuelve las etapas del plan ganador de una forma de consulta
+    """
+    find = {"find": shape.collection, "filter": shape.filter}
+    if shape.sort:
+        find["sort"] = dict(shape.sort)
+    if shape.limit:
+        find["limit"] = shape.limit
+    if shape.projection:
+        find["projection"] = shape.projection
+    result = await db.command({"explain": find, "verbosity": "queryPlanner"})
+    return _plan_stages(result["queryPlanner"]["winningPlan"])
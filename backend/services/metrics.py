@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Con varios workers, cada proceso escribe sus métricas en PROMETHEUS_MULTIPROC_DIR
+# y /metrics las agrega al responder
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_SLOW_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Duración de las peticiones HTTP por ruta y código de estado",
+    ["method", "route", "status"],
+    buckets=_FAST_BUCKETS + (5.0, 10.0),
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds",
+    "Duración de los comandos de MongoDB",
+    ["command", "outcome"],
+    buckets=_FAST_BUCKETS,
+)
+SMTP_OPERATION_DURATION = Histogram(
+    "smtp_operation_duration_seconds",
+    "Duración de las operaciones SMTP (connect, starttls, login, send)",
+    ["operation"],
+    buckets=_SLOW_BUCKETS,
+)
+SMTP_ERRORS = Counter(
+    "smtp_errors_total",
+    "Errores en operaciones SMTP",
+    ["operation"],
+)
+EMAIL_RENDER_DURATION = Histogram(
+    "email_render_duration_seconds",
+    "Tiempo de renderizado de los emails",
+    ["template"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025),
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Retraso del event loop respecto al intervalo de muestreo",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+ORDER_EVENTS_SUBSCRIBERS = Gauge(
+    "order_events_subscribers",
+    "Clientes conectados al feed de órdenes en vivo",
+    multiprocess_mode="livesum",
+)
+ORDER_EVENTS_DROPPED = Counter(
+    "order_events_dropped_total",
+    "Clientes del feed de órdenes desconectados por no consumir a tiempo",
+)
+
+
+@contextmanager
+def timed(histogram, errors: Optional[Counter] = None, **labels):
+    """
+    Mide la duración del bloque `with` en el histograma indicado
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if errors is not None:
+            errors.labels(**labels).inc()
+        raise
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Listener de pymongo que registra la duración de cada comando
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.labels(event.command_name, "ok").observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.labels(event.command_name, "error").observe(event.duration_micros / 1e6)
+
+
+class PrometheusMiddleware:
+    """
+    Middleware ASGI que mide cada petición etiquetada con la plantilla de la ruta
+    (por ejemplo `/api/orders/{order_id}`) para no multiplicar las series
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            HTTP_REQUEST_DURATION.labels(scope["method"], path, str(status)).observe(
+                time.perf_counter() - start
+            )
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """
+    Mide cuánto tarda el event loop en despertar respecto a lo pedido
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
+
+
+def render_metrics():
+    """
+    Devuelve el cuerpo y el content type de /metrics
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
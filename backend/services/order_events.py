@@ -0,0 +1,238 @@
+import asyncio
+import itertools
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Callable, Optional, Set
+
+from pymongo.errors import PyMongoError
+
+from services.metrics import ORDER_EVENTS_DROPPED, ORDER_EVENTS_SUBSCRIBERS
+from services.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+EVENT_ORDER_CREATED = "order.created"
+EVENT_ORDER_STATUS_CHANGED = "order.status_changed"
+EVENT_DROPPED = "dropped"
+
+# Lo que viaja en un evento de orden creada: lo justo para pintar la fila
+EVENT_ORDER_FIELDS = ("order_number", "status", "created_at", "updated_at")
+
+
+def order_created_event(order: dict) -> dict:
+    event = {"type": EVENT_ORDER_CREATED}
+    event.update({field: order.get(field) for field in EVENT_ORDER_FIELDS})
+    event["customer"] = {"nombre": order.get("customer", {}).get("nombre")}
+    event["payment"] = {"total": order.get("payment", {}).get("total")}
+    event["items_count"] = len(order.get("items", []))
+    return event
+
+
+def status_changed_event(order_number: str, status: str, at: Optional[datetime] = None) -> dict:
+    return {
+        "type": EVENT_ORDER_STATUS_CHANGED,
+        "order_number": order_number,
+        "status": status,
+        "updated_at": at or datetime.utcnow(),
+    }
+
+
+class Subscription:
+    """
+    Cola acotada de un suscriptor del feed de órdenes
+    """
+
+    def __init__(self, broker: "OrderEventBroker", queue_size: int):
+        self.broker = broker
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def offer(self, event: dict) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """
+        Siguiente evento, o None si no llega ninguno antes del timeout
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class OrderEventBroker:
+    """
+    Pub/sub en proceso para el feed de órdenes en vivo.
+
+    Cada suscriptor tiene una cola acotada; `publish` nunca espera: si la
+    cola de un cliente lento está llena, se le desconecta en lugar de frenar
+    a los demás o acumular memoria. El cliente reconecta y recarga la lista.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self._ids = itertools.count(1)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.queue_size)
+        self._subscribers.add(subscription)
+        ORDER_EVENTS_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            ORDER_EVENTS_SUBSCRIBERS.dec()
+
+    def publish(self, event: dict):
+        event.setdefault("id", next(self._ids))
+        for subscription in list(self._subscribers):
+            if not subscription.offer(event):
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription):
+        subscription.dropped = True
+        self.unsubscribe(subscription)
+        ORDER_EVENTS_DROPPED.inc()
+        # Se vacía la cola para que el aviso de desconexión llegue enseguida
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.offer({"type": EVENT_DROPPED})
+        logger.warning("Suscriptor del feed de órdenes desconectado por no consumir a tiempo")
+
+
+class OrderEvents:
+    """
+    Punto único desde el que los endpoints emiten eventos de órdenes.
+
+    Con un solo worker los eventos se publican directamente en el broker.
+    Con varios, cada proceso sólo ve sus propias escrituras, así que se activa
+    `use_change_stream`: los endpoints no publican nada y cada worker lee los
+    cambios de la colección `orders` desde un change stream de MongoDB
+    (requiere un replica set; basta uno de un solo nodo).
+
+    `on_order_changed` recibe el número de cada orden cuyo estado cambia según
+    el change stream, también los cambios hechos en otros workers; se usa para
+    invalidar la caché de órdenes del proceso.
+    """
+
+    def __init__(self, db, broker: OrderEventBroker, use_change_stream: bool = False,
+                 retry_delay: float = 5.0, on_order_changed: Optional[Callable[[str], None]] = None):
+        self.orders = db.orders
+        self.broker = broker
+        self.use_change_stream = use_change_stream
+        self.retry_delay = retry_delay
+        self.on_order_changed = on_order_changed
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token = None
+
+    def order_created(self, order: dict):
+        if not self.use_change_stream:
+            self.broker.publish(order_created_event(order))
+
+    def status_changed(self, order_number: str, status: str, at: Optional[datetime] = None):
+        if not self.use_change_stream:
+            self.broker.publish(status_changed_event(order_number, status, at))
+
+    def start(self):
+        if self.use_change_stream and self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        pipeline = [
+            {"$match": {"$or": [
+                {"operationType": "insert"},
+                {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+            ]}},
+            {"$project": {
+                "operationType": 1,
+                "updateDescription.updatedFields.status": 1,
+                "updateDescription.updatedFields.updated_at": 1,
+                **{f"fullDocument.{field}": 1 for field in EVENT_ORDER_FIELDS},
+                "fullDocument.customer.nombre": 1,
+                "fullDocument.payment.total": 1,
+                "fullDocument.items.id": 1,
+            }},
+        ]
+        logger.info("Feed de órdenes leyendo el change stream de MongoDB")
+        while True:
+            try:
+                async with self.orders.watch(
+                    pipeline, full_document="updateLookup", resume_after=self._resume_token
+                ) as stream:
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        self._publish_change(change)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.error(f"Error en el change stream de órdenes: {str(e)}")
+                await asyncio.sleep(self.retry_delay)
+
+    def _publish_change(self, change: dict):
+        document = change.get("fullDocument") or {}
+        if change["operationType"] == "insert":
+            self.broker.publish(order_created_event(document))
+            return
+        fields = change["updateDescription"]["updatedFields"]
+        order_number = document.get("order_number")
+        if order_number is None:
+            # Sin fullDocument (updateLookup) no sabemos de qué orden se trata
+            return
+        if self.on_order_changed is not None:
+            self.on_order_changed(order_number)
+        self.broker.publish(status_changed_event(order_number, fields["status"], fields.get("updated_at")))
+
+
+def format_sse(event: dict) -> bytes:
+    """
+    Codifica un evento en el formato de Server-Sent Events
+    """
+    lines = []
+    if "id" in event:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    return ("\n".join(lines) + "\ndata: ").encode() + dumps(event) + b"\n\n"
+
+
+async def stream_events(subscription: Subscription, is_disconnected,
+                        heartbeat: float = 15.0, retry_ms: int = 3000) -> AsyncIterator[bytes]:
+    """
+    Emite los eventos de una suscripción como SSE, con comentarios de
+    heartbeat para que proxies y navegadores no corten la conexión
+    """
+    try:
+        yield f"retry: {retry_ms}\n\n".encode()
+        while True:
+            event = await subscription.get(heartbeat)
+            if event is None:
+                if await is_disconnected():
+                    return
+                yield b": ping\n\n"
+                continue
+            yield format_sse(event)
+            if event["type"] == EVENT_DROPPED:
+                return
+    finally:
+        subscription.close()
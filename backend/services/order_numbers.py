@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from datetime import datetime, tzinfo
+from typing import List
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+ORDER_NUMBER_PREFIX = "AIR"
+
+
+def format_order_number(day: str, sequence: int) -> str:
+    return f"{ORDER_NUMBER_PREFIX}-{day}-{sequence:06d}"
+
+
+class OrderNumberGenerator:
+    """
+    Números de orden legibles y crecientes: AIR-YYYYMMDD-000123.
+
+    Cada worker reserva un bloque de la secuencia del día con un `$inc` sobre
+    la colección `order_counters` y reparte los números desde memoria, así
+    que sólo hay un viaje a MongoDB por bloque. Los números no se repiten
+    entre procesos y llegan casi en orden al índice de `order_number`; los
+    que quedan sin usar de un bloque al reiniciar se pierden (hay huecos).
+    El día es el de la zona horaria de la tienda (`tz`).
+    """
+
+    def __init__(self, db, tz: tzinfo, block_size: int = 100):
+        self.collection = db.order_counters
+        self.tz = tz
+        self.block_size = block_size
+        self._lock = asyncio.Lock()
+        self._day = None
+        self._next = 0
+        self._end = 0
+
+    def today(self) -> str:
+        return datetime.now(self.tz).strftime("%Y%m%d")
+
+    async def next_number(self) -> str:
+        return (await self.next_numbers(1))[0]
+
+    async def next_numbers(self, count: int) -> List[str]:
+        """
+        Reparte `count` números consecutivos del bloque actual, reservando
+        más en MongoDB si no alcanzan
+        """
+        if self.today() != self._day or self._end - self._next < count:
+            async with self._lock:
+                day = self.today()
+                if day != self._day:
+                    self._day, self._next, self._end = day, 0, 0
+                if self._end - self._next < count:
+                    await self._reserve(day, count)
+        start = self._next
+        self._next += count
+        return [format_order_number(self._day, sequence) for sequence in range(start, start + count)]
+
+    async def _reserve(self, day: str, count: int):
+        size = max(self.block_size, count)
+        counter = await self.collection.find_one_and_update(
+            {"_id": day},
+            {"$inc": {"sequence": size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        end = counter["sequence"] + 1
+        if end - size != self._end:
+            # Otro worker reservó entre medias: lo que quedaba del bloque anterior
+            # no es contiguo con el nuevo, así que se descarta
+            self._next = end - size
+        self._end = end
+        logger.debug(f"Reservados números de orden {end - size}-{end - 1} del {day}")
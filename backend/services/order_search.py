@@ -0,0 +1,54 @@
+import re
+from typing import Optional
+
+from models.search import name_words, normalize_document, normalize_email, normalize_phone
+
+# Campos normalizados que se guardan en `search` de cada orden para las búsquedas
+# de soporte; cada uno tiene su índice junto con (created_at, _id)
+SEARCH_EMAIL = "search.email"
+SEARCH_PHONES = "search.phones"
+SEARCH_DOCUMENT = "search.document"
+SEARCH_NAME_WORDS = "search.name_words"
+
+MIN_NAME_PREFIX = 2
+
+
+class InvalidSearch(ValueError):
+    pass
+
+
+def search_filter(email: Optional[str] = None, telefono: Optional[str] = None,
+                  dni_rnc: Optional[str] = None, nombre: Optional[str] = None) -> dict:
+    """
+    Filtro de MongoDB para los criterios indicados (se combinan con AND).
+
+    Email, teléfono y documento buscan el valor exacto ya normalizado. El
+    nombre busca órdenes que tengan cada palabra completa; la última, si hay
+    otras antes, puede ser el inicio de una palabra.
+    """
+    clauses = []
+    if email is not None:
+        clauses.append({SEARCH_EMAIL: _required(normalize_email(email), "email")})
+    if telefono is not None:
+        clauses.append({SEARCH_PHONES: _required(normalize_phone(telefono), "telefono")})
+    if dni_rnc is not None:
+        clauses.append({SEARCH_DOCUMENT: _required(normalize_document(dni_rnc), "dni_rnc")})
+    if nombre is not None:
+        words = name_words(nombre)
+        if not words or any(len(word) < MIN_NAME_PREFIX for word in words):
+            raise InvalidSearch(f"Cada palabra del nombre debe tener al menos {MIN_NAME_PREFIX} letras")
+        # Una regex es un rango sobre el índice multikey y obliga a ordenar por
+        # created_at en memoria; con una palabra por igualdad el índice da el
+        # orden y la regex de la última sólo filtra esas órdenes
+        clauses.extend({SEARCH_NAME_WORDS: word} for word in words[:-1])
+        last = words[-1]
+        clauses.append({SEARCH_NAME_WORDS: {"$regex": f"^{re.escape(last)}"} if len(words) > 1 else last})
+    if not clauses:
+        raise InvalidSearch("Indique email, telefono, dni_rnc o nombre")
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _required(value: str, field: str) -> str:
+    if not value:
+        raise InvalidSearch(f"El valor de {field} no es válido")
+    return value
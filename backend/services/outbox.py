@@ -0,0 +1,414 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from pymongo import ReturnDocument
+
+from models.order import Order
+from services.email_service import (
+    EMAIL_ORDER_NOTIFICATION,
+    EMAIL_ORDERS_SUMMARY,
+    ORDER_EMAIL_KINDS,
+    ORDERS_SUMMARY_FIELDS,
+    EmailService,
+)
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+# Resumen para la tienda que sigue acumulando órdenes; el worker no lo toma
+STATUS_COLLECTING = "collecting"
+
+DIGEST_TITLE = "Resumen de Órdenes"
+
+# Emails que una orden aún tiene que encolar; viajan en el documento de la
+# orden (mismo insert_one) y el barrido del worker los recupera si el proceso
+# cae antes de escribirlos en la bandeja de salida
+PENDING_EMAILS_FIELD = "pending_emails"
+PENDING_EMAILS_LOCK_FIELD = "pending_emails_locked_until"
+
+# Los trabajos enviados se borran pasada una semana
+SENT_JOB_TTL_SECONDS = 7 * 24 * 3600
+
+
+class EmailOutbox:
+    """
+    Bandeja de salida de emails persistida en MongoDB.
+
+    Cada orden deja un documento en la colección `email_outbox` con los emails
+    pendientes; un worker en segundo plano los envía fuera del ciclo de la
+    petición, todos los de una orden sobre la misma sesión SMTP.
+
+    Con `digest_window` > 0, la notificación a la tienda no sale por cada
+    orden: las órdenes se acumulan en un único documento `collecting` que pasa
+    a `pending` (y se envía como email de resumen) al llegar a
+    `digest_max_orders` órdenes o al cumplirse la ventana. Las órdenes con
+    total >= `digest_immediate_total` se notifican al momento. Las
+    confirmaciones al cliente siguen saliendo por orden.
+
+    Las órdenes se guardan con `pending_emails` (ver `mark_pending`); cada
+    `sweep_interval` segundos el worker revisa las que llevan más de
+    `sweep_grace` segundos marcadas: si todos sus emails ya están en la
+    bandeja sólo se les quita la marca, y si no, se encolan los que faltan.
+    Los trabajos enviados se borran a los `SENT_JOB_TTL_SECONDS` (índice TTL).
+    """
+
+    def __init__(self, db, email_service: EmailService, concurrency: int = 4,
+                 poll_interval: float = 1.0, max_attempts: int = 5,
+                 lock_timeout: float = 120.0, digest_window: float = 0.0,
+                 digest_max_orders: int = 50, digest_immediate_total: Optional[float] = None,
+                 sweep_interval: float = 60.0, sweep_grace: float = 60.0):
+        self.collection = db.email_outbox
+        self.orders = db.orders
+        self.email_service = email_service
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lock_timeout = lock_timeout
+        self.digest_window = digest_window
+        self.digest_max_orders = digest_max_orders
+        self.digest_immediate_total = digest_immediate_total
+        self.sweep_interval = sweep_interval
+        self.sweep_grace = sweep_grace
+        self._next_sweep = 0.0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: set = set()
+
+    @staticmethod
+    def build_job(order_number: str, kinds=ORDER_EMAIL_KINDS, **extra) -> dict:
+        """
+        Crea el documento de la bandeja de salida para una orden
+        """
+        now = datetime.utcnow()
+        return {
+            "_id": str(uuid.uuid4()),
+            "order_number": order_number,
+            "emails": list(kinds),
+            **extra,
+            "status": STATUS_PENDING,
+            "attempts": 0,
+            "last_error": None,
+            "next_attempt_at": now,
+            "locked_until": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    @staticmethod
+    def mark_pending(order_doc: dict, kinds=ORDER_EMAIL_KINDS) -> dict:
+        """
+        Anota en el documento de la orden, antes de guardarlo, los emails que
+        le corresponden
+        """
+        order_doc[PENDING_EMAILS_FIELD] = list(kinds)
+        return order_doc
+
+    async def enqueue_order(self, order: Order, kinds=ORDER_EMAIL_KINDS):
+        """
+        Encola los emails de una orden y despierta al worker
+        """
+        await self._enqueue(order.order_number, order.payment.total, kinds)
+        self.notify()
+
+    async def _enqueue(self, order_number: str, total: float, kinds):
+        if EMAIL_ORDER_NOTIFICATION in kinds and self._goes_to_digest(total):
+            kinds = [kind for kind in kinds if kind != EMAIL_ORDER_NOTIFICATION]
+            await self._add_to_digest(order_number)
+        if kinds:
+            await self.collection.insert_one(self.build_job(order_number, kinds))
+
+    async def enqueue_orders(self, order_numbers: List[str], kinds=ORDER_EMAIL_KINDS):
+        """
+        Encola los emails de varias órdenes con una sola escritura
+        """
+        if order_numbers:
+            await self.collection.insert_many(
+                [self.build_job(number, kinds) for number in order_numbers], ordered=False
+            )
+            self.notify()
+
+    async def enqueue_summary(self, order_numbers: List[str], title: str):
+        """
+        Encola un único email para la tienda que resume varias órdenes
+        """
+        await self.collection.insert_one(
+            self.build_job(None, [EMAIL_ORDERS_SUMMARY], order_numbers=list(order_numbers), title=title)
+        )
+        self.notify()
+
+    def _goes_to_digest(self, total: float) -> bool:
+        if self.digest_window <= 0:
+            return False
+        return self.digest_immediate_total is None or total < self.digest_immediate_total
+
+    async def _add_to_digest(self, order_number: str):
+        """
+        Añade la orden al resumen abierto (lo crea si no hay ninguno) y lo
+        cierra si alcanza el máximo de órdenes.
+
+        Si dos workers crean a la vez el primer resumen quedan dos abiertos;
+        ambos se envían al cerrarse la ventana, no se pierde ninguna orden.
+        """
+        job = self.build_job(None, [EMAIL_ORDERS_SUMMARY], title=DIGEST_TITLE)
+        del job["status"]
+        digest = await self.collection.find_one_and_update(
+            {"status": STATUS_COLLECTING},
+            {
+                "$push": {"order_numbers": order_number},
+                "$inc": {"digest_size": 1},
+                "$setOnInsert": job,
+            },
+            projection={"digest_size": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if digest["digest_size"] >= self.digest_max_orders:
+            await self._release_digests({"_id": digest["_id"]})
+
+    async def _release_digests(self, query: dict) -> int:
+        """
+        Pasa a `pending` los resúmenes abiertos que cumplan la consulta
+        """
+        now = datetime.utcnow()
+        result = await self.collection.update_many(
+            {"status": STATUS_COLLECTING, **query},
+            {"$set": {"status": STATUS_PENDING, "next_attempt_at": now, "updated_at": now}},
+        )
+        if result.modified_count:
+            logger.info(f"{result.modified_count} resumen(es) de órdenes listos para enviar")
+        return result.modified_count
+
+    async def flush_digests(self, force: bool = False) -> int:
+        """
+        Libera los resúmenes cuya ventana terminó (o todos, con `force`)
+        """
+        if force:
+            return await self._release_digests({})
+        if self.digest_window <= 0:
+            return 0
+        deadline = datetime.utcnow() - timedelta(seconds=self.digest_window)
+        return await self._release_digests({"created_at": {"$lte": deadline}})
+
+    async def sweep_pending(self, limit: int = 500) -> int:
+        """
+        Revisa las órdenes que siguen con `pending_emails` y encola los emails
+        que no llegaron a la bandeja de salida; devuelve cuántas recuperó.
+
+        Procesa lotes de `limit` órdenes hasta que uno sale incompleto, para
+        que la marca no se acumule con más de `limit` órdenes por barrido.
+        """
+        recovered = 0
+        while True:
+            batch, batch_recovered = await self._sweep_batch(limit)
+            recovered += batch_recovered
+            if batch < limit:
+                break
+        if recovered:
+            logger.warning(f"Emails de {recovered} orden(es) recuperados por el barrido de la bandeja de salida")
+            self.notify()
+        return recovered
+
+    async def _sweep_batch(self, limit: int):
+        """
+        Revisa un lote de órdenes marcadas; devuelve (revisadas, recuperadas).
+
+        Cada orden del lote sale de la consulta: o se le quita la marca o
+        queda bloqueada por el worker que la encola.
+        """
+        now = datetime.utcnow()
+        marked = await self.orders.find(
+            {PENDING_EMAILS_FIELD: {"$exists": True},
+             PENDING_EMAILS_LOCK_FIELD: {"$not": {"$gt": now}},
+             "created_at": {"$lte": now - timedelta(seconds=self.sweep_grace)}},
+            {"order_number": 1, "payment.total": 1, PENDING_EMAILS_FIELD: 1, PENDING_EMAILS_LOCK_FIELD: 1},
+        ).limit(limit).to_list(limit)
+        if not marked:
+            return 0, 0
+
+        numbers = [order["order_number"] for order in marked]
+        with_job, in_digest = set(), set()
+        async for job in self.collection.find(
+            {"$or": [{"order_number": {"$in": numbers}}, {"order_numbers": {"$in": numbers}}]},
+            {"order_number": 1, "order_numbers": 1},
+        ):
+            with_job.add(job.get("order_number"))
+            in_digest.update(job.get("order_numbers") or ())
+
+        queued, missing = [], {}
+        for order in marked:
+            number = order["order_number"]
+            # La confirmación al cliente siempre va en un trabajo propio de la
+            # orden; la notificación a la tienda, en ese trabajo o en un resumen
+            kinds = [
+                kind for kind in order[PENDING_EMAILS_FIELD]
+                if number not in with_job
+                and not (kind == EMAIL_ORDER_NOTIFICATION and number in in_digest)
+            ]
+            if kinds:
+                missing[number] = kinds
+            else:
+                queued.append(number)
+        if queued:
+            await self._clear_pending(queued)
+
+        recovered = 0
+        for order in marked:
+            number = order["order_number"]
+            if number not in missing:
+                continue
+            locked_until = order.get(PENDING_EMAILS_LOCK_FIELD)
+            # Con varios workers, sólo el que se queda con la orden la encola;
+            # si cae antes de quitar la marca, otro la revisa al vencer el bloqueo
+            claimed = await self.orders.find_one_and_update(
+                {"order_number": number,
+                 PENDING_EMAILS_FIELD: {"$exists": True},
+                 PENDING_EMAILS_LOCK_FIELD: locked_until},
+                {"$set": {PENDING_EMAILS_LOCK_FIELD: now + timedelta(seconds=self.lock_timeout)}},
+                projection={"_id": 1},
+            )
+            if claimed is None:
+                continue
+            await self._enqueue(number, order["payment"]["total"], missing[number])
+            await self._clear_pending([number])
+            recovered += 1
+        return len(marked), recovered
+
+    async def _clear_pending(self, order_numbers: List[str]):
+        await self.orders.update_many(
+            {"order_number": {"$in": order_numbers}},
+            {"$unset": {PENDING_EMAILS_FIELD: "", PENDING_EMAILS_LOCK_FIELD: ""}},
+        )
+
+    def notify(self):
+        self._wakeup.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="email-outbox-worker")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def _run(self):
+        logger.info(f"Worker de email iniciado (concurrencia={self.concurrency})")
+        while True:
+            try:
+                if time.monotonic() >= self._next_sweep:
+                    self._next_sweep = time.monotonic() + self.sweep_interval
+                    await self.sweep_pending()
+                await self.flush_digests()
+                claimed = await self._drain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error en el worker de email: {str(e)}")
+                claimed = 0
+
+            if claimed:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _drain(self) -> int:
+        """
+        Reclama trabajos mientras haya cupo de concurrencia y trabajos listos
+        """
+        claimed = 0
+        while True:
+            await self._semaphore.acquire()
+            job = await self._claim()
+            if job is None:
+                self._semaphore.release()
+                return claimed
+            claimed += 1
+            task = asyncio.create_task(self._process(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": STATUS_PENDING, "next_attempt_at": {"$lte": now}},
+                    {"status": STATUS_PROCESSING, "locked_until": {"$lte": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": STATUS_PROCESSING,
+                    "locked_until": now + timedelta(seconds=self.lock_timeout),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _process(self, job: dict):
+        try:
+            results, error = await self._send(job)
+            await self._complete(job, results, error)
+        except Exception as e:
+            logger.error(f"Error procesando emails de {_describe(job)}: {str(e)}")
+        finally:
+            self._semaphore.release()
+
+    async def _send(self, job: dict):
+        if job.get("order_numbers"):
+            orders = await self.orders.find(
+                {"order_number": {"$in": job["order_numbers"]}}, ORDERS_SUMMARY_FIELDS
+            ).to_list(None)
+            sent = await asyncio.to_thread(self.email_service.send_orders_summary, orders, job["title"])
+            return {EMAIL_ORDERS_SUMMARY: sent}, None if sent else "Fallo en el envío SMTP"
+
+        order_doc = await self.orders.find_one({"order_number": job["order_number"]})
+        if not order_doc:
+            return {}, "Orden no encontrada"
+        order = Order(**order_doc)
+
+        # smtplib es bloqueante: se ejecuta fuera del event loop
+        results = await asyncio.to_thread(self.email_service.send_order_emails, order, job["emails"])
+        return results, None if all(results.values()) else "Fallo en el envío SMTP"
+
+    async def _complete(self, job: dict, results: dict, error: Optional[str]):
+        now = datetime.utcnow()
+        remaining = [kind for kind in job["emails"] if not results.get(kind)]
+        if not remaining:
+            update = {"status": STATUS_SENT, "emails": [], "locked_until": None,
+                      "last_error": None, "sent_at": now, "updated_at": now}
+        elif job["attempts"] >= self.max_attempts:
+            update = {"status": STATUS_FAILED, "emails": remaining, "locked_until": None,
+                      "last_error": error, "updated_at": now}
+            logger.error(f"Emails {remaining} de {_describe(job)} descartados tras {job['attempts']} intentos")
+        else:
+            # Reintento con espera exponencial (2, 4, 8... segundos, máx. 5 minutos)
+            delay = min(2 ** job["attempts"], 300)
+            update = {"status": STATUS_PENDING, "emails": remaining, "locked_until": None,
+                      "last_error": error, "next_attempt_at": now + timedelta(seconds=delay),
+                      "updated_at": now}
+        await self.collection.update_one({"_id": job["_id"]}, {"$set": update})
+
+
+def _describe(job: dict) -> str:
+    return job.get("order_number") or f"{len(job.get('order_numbers', []))} órdenes"
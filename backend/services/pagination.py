@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: Any, object_id: ObjectId) -> str:
+    """
+    Codifica la posición (created_at, _id) del último documento de una página
+    """
+    if isinstance(created_at, datetime):
+        payload = {"d": created_at.isoformat(), "i": str(object_id)}
+    else:
+        # Órdenes antiguas con created_at guardado como texto
+        payload = {"c": created_at, "i": str(object_id)}
+    payload = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, ObjectId]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if "d" in payload:
+            return datetime.fromisoformat(payload["d"]), ObjectId(payload["i"])
+        return payload["c"], ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursor(f"Cursor inválido: {token}") from e
+
+
+def keyset_filter(value: Any, object_id: ObjectId, field: str = "created_at") -> dict:
+    """
+    Filtro para los documentos posteriores al cursor en orden (field, _id) descendente
+    """
+    return {
+        "$or": [
+            {field: {"$lt": value}},
+            {field: value, "_id": {"$lt": object_id}},
+        ]
+    }
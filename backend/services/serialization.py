@@ -0,0 +1,44 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        value = value.to_decimal()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serializa documentos de MongoDB (ObjectId, datetime, Decimal) a JSON con orjson
+    """
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class MongoJSONResponse(JSONResponse):
+    """
+    Respuesta JSON basada en orjson que acepta documentos de MongoDB tal cual.
+
+    Devolverla directamente desde un endpoint evita el `jsonable_encoder`
+    genérico de FastAPI.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
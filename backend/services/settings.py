@@ -0,0 +1,112 @@
+import os
+from typing import List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from pydantic import BaseModel, Field, SecretStr, field_validator
+
+# Los días de la tienda se cuentan en la hora de República Dominicana
+DEFAULT_TIMEZONE = "America/Santo_Domingo"
+
+# Nombres anteriores de variables de entorno que se siguen leyendo si falta la nueva
+LEGACY_ENV_NAMES = {"store_timezone": "ANALYTICS_TIMEZONE"}
+
+
+class Settings(BaseModel):
+    """
+    Configuración de la app; `from_env` la lee de las variables de entorno
+    """
+
+    mongo_url: str
+    db_name: str
+
+    # Pool de conexiones de MongoDB (uno por proceso worker)
+    mongo_max_pool_size: int = Field(100, ge=1)
+    mongo_min_pool_size: int = Field(0, ge=0)
+    mongo_max_idle_time_ms: Optional[int] = Field(None, ge=0)
+    mongo_connect_timeout_ms: int = Field(10000, ge=1)
+    mongo_server_selection_timeout_ms: int = Field(10000, ge=1)
+    mongo_socket_timeout_ms: Optional[int] = Field(None, ge=1)
+    mongo_wait_queue_timeout_ms: Optional[int] = Field(None, ge=1)
+    mongo_compressors: List[str] = Field(default_factory=list)
+    # Conexiones que se abren al arrancar, antes de aceptar tráfico
+    mongo_warmup_connections: int = Field(1, ge=0)
+
+    order_cache_size: int = 10000
+    # Cada worker invalida su caché al cambiar una orden; con varios workers y
+    # sin change stream, los demás pueden servirla desactualizada hasta este TTL
+    order_cache_ttl: float = 30.0
+    catalog_cache_ttl: float = 60.0
+    # Números de orden que cada worker reserva de una vez
+    order_number_block_size: int = Field(100, ge=1)
+    # Segundos que una petición con Idempotency-Key retiene la clave
+    idempotency_lease_seconds: float = Field(60.0, gt=0)
+    email_worker_concurrency: int = 4
+    # Resumen de órdenes para la tienda: 0 = un email por orden
+    owner_digest_window_seconds: float = Field(0.0, ge=0)
+    owner_digest_max_orders: int = Field(50, ge=1)
+    # Órdenes con este total o más se notifican al momento aunque haya resumen
+    owner_digest_immediate_total: Optional[float] = None
+    order_events_queue_size: int = 256
+    # Con varios workers, cada uno lee los eventos (e invalida su caché de
+    # órdenes) desde el change stream de MongoDB
+    order_events_change_stream: bool = False
+    cors_origins: List[str] = Field(default_factory=lambda: ["*"])
+    # Token para las escrituras de administración (catálogo, importación y
+    # estados de órdenes); sin él, esas escrituras quedan deshabilitadas
+    admin_token: Optional[SecretStr] = None
+    # Zona horaria de la tienda: días de los reportes, números de orden y
+    # fechas de los emails (antes ANALYTICS_TIMEZONE)
+    store_timezone: str = DEFAULT_TIMEZONE
+
+    @field_validator("store_timezone")
+    @classmethod
+    def _known_timezone(cls, value: str) -> str:
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Zona horaria desconocida: {value}")
+        return value
+
+    @property
+    def store_tzinfo(self) -> ZoneInfo:
+        return ZoneInfo(self.store_timezone)
+
+    @classmethod
+    def from_env(cls, **overrides) -> "Settings":
+        """
+        Lee cada campo de la variable de entorno con su nombre en mayúsculas
+        (por ejemplo MONGO_MAX_POOL_SIZE); las listas van separadas por comas
+        """
+        values = {}
+        for name, field in cls.model_fields.items():
+            raw = os.environ.get(name.upper())
+            if not raw and name in LEGACY_ENV_NAMES:
+                raw = os.environ.get(LEGACY_ENV_NAMES[name])
+            if raw is None or raw == "":
+                continue
+            if field.annotation == List[str]:
+                values[name] = [item.strip() for item in raw.split(",") if item.strip()]
+            else:
+                values[name] = raw
+        values.update(overrides)
+        return cls(**values)
+
+    def mongo_client_options(self) -> dict:
+        """
+        Opciones de pool, timeouts y compresión para AsyncIOMotorClient
+        """
+        options = {
+            "maxPoolSize": self.mongo_max_pool_size,
+            "minPoolSize": self.mongo_min_pool_size,
+            "connectTimeoutMS": self.mongo_connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.mongo_server_selection_timeout_ms,
+        }
+        optional = {
+            "maxIdleTimeMS": self.mongo_max_idle_time_ms,
+            "socketTimeoutMS": self.mongo_socket_timeout_ms,
+            "waitQueueTimeoutMS": self.mongo_wait_queue_timeout_ms,
+        }
+        options.update({key: value for key, value in optional.items() if value is not None})
+        if self.mongo_compressors:
+            options["compressors"] = ",".join(self.mongo_compressors)
+        return options
@@ -0,0 +1,155 @@
+import logging
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from services.metrics import SMTP_ERRORS, SMTP_OPERATION_DURATION, timed
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSMTPConnection:
+    """
+    Sesión SMTP ya autenticada que se reutiliza entre envíos
+    """
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+    def sendmail(self, from_addr: str, to_addrs, msg: str):
+        with timed(SMTP_OPERATION_DURATION, SMTP_ERRORS, operation="send"):
+            self.smtp.sendmail(from_addr, to_addrs, msg)
+        self.messages_sent += 1
+        self.last_used = time.monotonic()
+
+    def is_alive(self) -> bool:
+        try:
+            status, _ = self.smtp.noop()
+            return status == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            try:
+                self.smtp.close()
+            except Exception:
+                pass
+
+
+class SMTPConnectionPool:
+    """
+    Pool de sesiones SMTP persistentes.
+
+    Evita repetir conexión, STARTTLS y login en cada email: las sesiones
+    inactivas se guardan, se comprueban con NOOP antes de reutilizarlas y se
+    reemplazan al fallar o al alcanzar el máximo de mensajes por sesión.
+    Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, host: str, port: int, username: str = "", password: str = "",
+                 use_tls: bool = True, timeout: float = 30.0, max_size: int = 4,
+                 max_messages_per_session: int = 50, max_idle_time: float = 240.0,
+                 noop_after: float = 10.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_size = max_size
+        self.max_messages_per_session = max_messages_per_session
+        self.max_idle_time = max_idle_time
+        self.noop_after = noop_after
+        self._idle: List[PooledSMTPConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _connect(self) -> PooledSMTPConnection:
+        with timed(SMTP_OPERATION_DURATION, SMTP_ERRORS, operation="connect"):
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                with timed(SMTP_OPERATION_DURATION, SMTP_ERRORS, operation="starttls"):
+                    smtp.starttls()
+            if self.password:
+                with timed(SMTP_OPERATION_DURATION, SMTP_ERRORS, operation="login"):
+                    smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        logger.debug(f"Nueva sesión SMTP con {self.host}:{self.port}")
+        return PooledSMTPConnection(smtp)
+
+    def _is_reusable(self, conn: PooledSMTPConnection) -> bool:
+        if conn.messages_sent >= self.max_messages_per_session:
+            return False
+        idle = time.monotonic() - conn.last_used
+        if idle > self.max_idle_time:
+            return False
+        # Sólo se paga el NOOP si la sesión lleva un rato sin usarse
+        if idle > self.noop_after and not conn.is_alive():
+            return False
+        return True
+
+    def _checkout(self) -> PooledSMTPConnection:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._is_reusable(conn):
+                return conn
+            conn.close()
+
+    def _checkin(self, conn: PooledSMTPConnection, broken: bool):
+        if broken or conn.messages_sent >= self.max_messages_per_session:
+            conn.close()
+            return
+        with self._lock:
+            self._idle.append(conn)
+
+    @contextmanager
+    def session(self):
+        """
+        Presta una sesión SMTP del pool durante el bloque `with`
+        """
+        self._slots.acquire()
+        conn: Optional[PooledSMTPConnection] = None
+        broken = False
+        try:
+            conn = self._checkout()
+            yield conn
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError):
+            broken = True
+            raise
+        finally:
+            if conn is not None:
+                self._checkin(conn, broken)
+            self._slots.release()
+
+    def sendmail(self, from_addr: str, to_addrs, msg: str):
+        """
+        Envía un mensaje reconectando una vez si la sesión reutilizada se cayó
+        """
+        try:
+            with self.session() as conn:
+                conn.sendmail(from_addr, to_addrs, msg)
+        except smtplib.SMTPServerDisconnected:
+            with self.session() as conn:
+                conn.sendmail(from_addr, to_addrs, msg)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
@@ -0,0 +1,90 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from services.pagination import decode_cursor, encode_cursor, keyset_filter
+
+# Los status checks y sus contadores por hora se borran solos pasado este tiempo
+STATUS_CHECK_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def _hour(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+class StatusCheckStore:
+    """
+    Status checks con caducidad (índice TTL) y un resumen de salud precalculado.
+
+    Cada check actualiza además `status_clients` (última vez visto por cliente)
+    y `status_check_counts` (checks por cliente y hora), de modo que el resumen
+    no depende de cuántos checks se hayan guardado.
+    """
+
+    def __init__(self, db):
+        self.checks = db.status_checks
+        self.clients = db.status_clients
+        self.counts = db.status_check_counts
+
+    async def record(self, check: dict):
+        await self.checks.insert_one(check)
+        timestamp = check["timestamp"]
+        client_name = check["client_name"]
+        hour = _hour(timestamp)
+        await asyncio.gather(
+            self.clients.update_one(
+                {"_id": client_name},
+                {"$max": {"last_seen": timestamp}, "$min": {"first_seen": timestamp}, "$inc": {"total": 1}},
+                upsert=True,
+            ),
+            self.counts.update_one(
+                {"_id": f"{client_name}:{hour.isoformat()}"},
+                {"$inc": {"count": 1}, "$setOnInsert": {"client_name": client_name, "hour": hour}},
+                upsert=True,
+            ),
+        )
+
+    async def page(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Página de checks del más reciente al más antiguo y el cursor de la siguiente
+        """
+        query = keyset_filter(*decode_cursor(cursor), field="timestamp") if cursor else {}
+        docs = await self.checks.find(query, {"id": 1, "client_name": 1, "timestamp": 1}).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).limit(limit + 1).to_list(limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]["timestamp"], docs[-1]["_id"])
+        for doc in docs:
+            del doc["_id"]
+        return docs, next_cursor
+
+    async def summary(self, window_hours: int = 24) -> dict:
+        """
+        Última vez visto por cliente y número de checks en la ventana indicada
+        """
+        now = datetime.utcnow()
+        since = _hour(now - timedelta(hours=window_hours - 1))
+        clients = await self.clients.find({}).to_list(None)
+        counts = defaultdict(int)
+        async for doc in self.counts.find({"hour": {"$gte": since}}, {"client_name": 1, "count": 1}):
+            counts[doc["client_name"]] += doc["count"]
+
+        return {
+            "window_hours": window_hours,
+            "since": since,
+            "clients": [
+                {
+                    "client_name": client["_id"],
+                    "last_seen": client["last_seen"],
+                    "first_seen": client.get("first_seen"),
+                    "seconds_since_last_seen": round((now - client["last_seen"]).total_seconds(), 1),
+                    "checks_in_window": counts.get(client["_id"], 0),
+                    "checks_total": client["total"],
+                }
+                for client in sorted(clients, key=lambda client: client["_id"])
+            ],
+        }
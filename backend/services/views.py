@@ -0,0 +1,48 @@
+from typing import Optional
+
+from models.order import Order
+from services.outbox import PENDING_EMAILS_FIELD, PENDING_EMAILS_LOCK_FIELD
+
+# Campos que muestra el listado de administración
+SUMMARY_FIELDS = ("order_number", "customer.nombre", "payment.total", "status", "created_at")
+
+# Campos internos del documento que la API no devuelve: claves normalizadas de
+# la búsqueda, emails aún por revisar y marca del último cambio de estado en lote
+INTERNAL_FIELDS = ("search", PENDING_EMAILS_FIELD, PENDING_EMAILS_LOCK_FIELD, "status_change_id")
+
+VIEWS = ("summary", "full")
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def order_projection(view: str = "full", fields: Optional[str] = None) -> dict:
+    """
+    Traduce `view=summary|full` o `fields=a,b.c` en una proyección de MongoDB.
+
+    La vista completa excluye los campos internos. `created_at` se incluye
+    siempre porque la paginación por cursor lo necesita.
+    """
+    if fields:
+        requested = list(dict.fromkeys(
+            [field.strip() for field in fields.split(",") if field.strip()] + ["created_at"]
+        ))
+        unknown = [field for field in requested if field.split(".", 1)[0] not in Order.model_fields]
+        if unknown:
+            raise InvalidFields(f"Campos desconocidos: {', '.join(unknown)}")
+        # Rutas que MongoDB rechazaría: operadores posicionales y segmentos vacíos
+        invalid = [field for field in requested if any(not part or part.startswith("$") for part in field.split("."))]
+        if invalid:
+            raise InvalidFields(f"Campos inválidos: {', '.join(invalid)}")
+        # Pedir un campo y una de sus partes (customer,customer.email) es una colisión de rutas
+        overlapping = [
+            field for field in requested
+            if any(field.startswith(f"{other}.") for other in requested)
+        ]
+        if overlapping:
+            raise InvalidFields(f"Campos que se solapan con otro pedido: {', '.join(overlapping)}")
+        return {field: 1 for field in requested}
+    if view == "summary":
+        return {field: 1 for field in SUMMARY_FIELDS}
+    return {field: 0 for field in INTERNAL_FIELDS}
@@ -0,0 +1,74 @@
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# El backend se importa como en producción (`from services.x import ...`)
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    """
+    Crea clientes HTTP de la app sobre un MongoDB en memoria (mongomock-motor)
+    """
+    import motor.motor_asyncio
+    from fastapi.testclient import TestClient
+    from mongomock_motor import AsyncMongoMockClient
+
+    import server
+    from services.settings import Settings
+
+    monkeypatch.setattr(motor.motor_asyncio, "AsyncIOMotorClient", AsyncMongoMockClient)
+    clients = []
+
+    def make(**overrides) -> TestClient:
+        settings = Settings(
+            mongo_url="mongodb://localhost",
+            db_name=f"test_{uuid.uuid4().hex}",
+            mongo_warmup_connections=0,
+            **overrides
+        )
+        client = TestClient(server.create_app(settings))
+        client.__enter__()
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.__exit__(None, None, None)
+
+
+@pytest.fixture
+def build_order():
+    """
+    Crea órdenes de prueba; los argumentos reemplazan los campos por defecto
+    """
+    from models.order import Order
+
+    def build(**overrides) -> Order:
+        fields = {
+            "customer": {"nombre": "Ana", "email": "ana@example.com", "telefono": "809-555-0101", "dni_rnc": "001"},
+            "shipping": {"provincia": "Santiago", "ciudad": "Santiago", "direccion": "Calle 1"},
+            "payment": {"metodo_pago": "Visa", "total": 89.99},
+            "items": [{"id": 1, "name": "Air Classic", "price": 89.99, "quantity": 1,
+                       "selectedSize": "M", "image": "x.jpg"}],
+        }
+        fields.update(overrides)
+        return Order(**fields)
+
+    return build
+
+
+@pytest.fixture
+def insert_orders(build_order):
+    """
+    Guarda órdenes directamente en MongoDB: insert_orders(client, **{order_number: status})
+    """
+    def insert(client, **statuses):
+        docs = [build_order(order_number=number, status=status).to_document() for number, status in statuses.items()]
+        client.portal.call(client.app.state.services.db.orders.insert_many, docs)
+
+    return insert
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from services.cache import AsyncLRUCache
+from services.order_events import OrderEventBroker, OrderEvents
+
+
+class SlowLoader:
+    def __init__(self, value="orden"):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(self.value, Exception):
+            raise self.value
+        return self.value
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = AsyncLRUCache()
+        loader = SlowLoader()
+        waiters = [asyncio.create_task(cache.get_or_load("AIR-1", loader)) for _ in range(10)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        assert await asyncio.gather(*waiters) == ["orden"] * 10
+        assert loader.calls == 1
+        assert await cache.get_or_load("AIR-1", loader) == "orden"
+        assert loader.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_the_first_caller_does_not_fail_the_others():
+    async def scenario():
+        cache = AsyncLRUCache()
+        loader = SlowLoader()
+        leader = asyncio.create_task(cache.get_or_load("AIR-1", loader))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_load("AIR-1", loader))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        loader.release.set()
+        assert await follower == "orden"
+        assert leader.cancelled()
+        assert loader.calls == 1
+        assert cache.get("AIR-1") == "orden"
+
+    asyncio.run(scenario())
+
+
+def test_load_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        cache = AsyncLRUCache()
+        loader = SlowLoader(RuntimeError("mongo caído"))
+        waiters = [asyncio.create_task(cache.get_or_load("AIR-1", loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert cache.get("AIR-1") is None
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_during_a_load_discards_its_value():
+    async def scenario():
+        cache = AsyncLRUCache()
+        loader = SlowLoader("versión anterior")
+        waiter = asyncio.create_task(cache.get_or_load("AIR-1", loader))
+        await asyncio.sleep(0)
+        cache.invalidate("AIR-1")
+        loader.release.set()
+        assert await waiter == "versión anterior"
+        assert cache.get("AIR-1") is None
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("operation", ["update", "insert"])
+def test_change_stream_updates_invalidate_the_order_cache(operation):
+    cache = AsyncLRUCache()
+    cache.set("AIR-1", {"status": "confirmed"})
+
+    class Db:
+        orders = None
+
+    events = OrderEvents(Db(), OrderEventBroker(), use_change_stream=True, on_order_changed=cache.invalidate)
+    document = {"order_number": "AIR-1", "status": "shipped"}
+    change = {"operationType": operation, "fullDocument": document}
+    if operation == "update":
+        change["updateDescription"] = {"updatedFields": {"status": "shipped"}}
+    events._publish_change(change)
+    assert (cache.get("AIR-1") is None) == (operation == "update")
+
+
+@pytest.mark.parametrize("since, status", [
+    ("Sun, 18 Oct 2026 12:00:00 -0000", 304),  # zona -0000: fecha sin tzinfo
+    ("Sun, 18 Oct 2026 12:00:00 GMT", 304),
+    ("Sun, 18 Oct 2026 10:00:00 -0000", 200),
+])
+def test_order_if_modified_since(make_client, build_order, since, status):
+    client = make_client()
+    order = build_order(order_number="AIR-1", updated_at=datetime(2026, 10, 18, 11, 0))
+    client.portal.call(client.app.state.services.db.orders.insert_one, order.to_document())
+
+    response = client.get("/api/orders/AIR-1", headers={"If-Modified-Since": since})
+    assert response.status_code == status
@@ -0,0 +1,15 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from services.email_templates import render_customer_confirmation, render_order_notification
+from services.settings import DEFAULT_TIMEZONE
+
+
+def test_emails_show_when_the_order_was_placed_in_store_time(build_order):
+    # 02:30 UTC del 19 son las 22:30 del 18 en Santo Domingo
+    order = build_order(created_at=datetime(2026, 10, 19, 2, 30))
+    tz = ZoneInfo(DEFAULT_TIMEZONE)
+    notification = render_order_notification(order, tz)
+    assert "18/10/2026 22:30" in notification
+    assert "18/10/2026 22:30:00" in notification
+    assert "18/10/2026 22:30" in render_customer_confirmation(order, tz)
@@ -0,0 +1,15 @@
+from services.export import order_to_csv_row
+
+
+def test_csv_cells_cannot_start_a_formula(build_order):
+    order = build_order(
+        customer={"nombre": "=HYPERLINK(\"http://x\")", "email": "ana@example.com",
+                  "telefono": "+1 809-555-0101", "dni_rnc": "-001"},
+        shipping={"provincia": "Santiago", "ciudad": "@SUM(A1)", "direccion": "\tCalle 1"},
+        payment={"metodo_pago": "Visa", "total": 89.99},
+    ).to_document()
+    row = order_to_csv_row(order)
+    assert "'=HYPERLINK(\"http://x\")" in row
+    assert "'+1 809-555-0101" in row and "'-001" in row
+    assert "'@SUM(A1)" in row and "'\tCalle 1" in row
+    assert "ana@example.com" in row and 89.99 in row
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+
+from services.idempotency import STATUS_COMPLETED, STATUS_IN_PROGRESS, IdempotencyStore
+
+
+async def expire_lease(store: IdempotencyStore, key: str):
+    await store.collection.update_one(
+        {"_id": key}, {"$set": {"locked_until": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+
+
+def test_retry_while_in_progress_is_rejected():
+    async def scenario():
+        store = IdempotencyStore(AsyncMongoMockClient()["test"])
+        assert await store.reserve("clave", "a") is None
+        previous = await store.reserve("clave", "b")
+        assert previous["status"] == STATUS_IN_PROGRESS
+
+    asyncio.run(scenario())
+
+
+def test_completed_response_is_replayed():
+    async def scenario():
+        store = IdempotencyStore(AsyncMongoMockClient()["test"])
+        await store.reserve("clave", "a")
+        await store.complete("clave", "a", {"order_id": "AIR-1"})
+        previous = await store.reserve("clave", "b")
+        assert previous["status"] == STATUS_COMPLETED
+        assert previous["response"] == {"order_id": "AIR-1"}
+
+    asyncio.run(scenario())
+
+
+def test_expired_reservation_is_taken_over():
+    async def scenario():
+        store = IdempotencyStore(AsyncMongoMockClient()["test"])
+        await store.reserve("clave", "caido")
+        await expire_lease(store, "clave")
+
+        assert await store.reserve("clave", "reintento") is None
+        # La petición original ya no puede completar ni liberar la clave
+        await store.complete("clave", "caido", {"order_id": "AIR-1"})
+        await store.release("clave", "caido")
+        record = await store.collection.find_one({"_id": "clave"})
+        assert record["status"] == STATUS_IN_PROGRESS and record["owner"] == "reintento"
+
+        await store.complete("clave", "reintento", {"order_id": "AIR-2"})
+        assert (await store.reserve("clave", "otro"))["response"] == {"order_id": "AIR-2"}
+
+    asyncio.run(scenario())
+
+
+def test_only_one_retry_takes_over_an_expired_reservation():
+    async def scenario():
+        store = IdempotencyStore(AsyncMongoMockClient()["test"])
+        await store.reserve("clave", "caido")
+        await expire_lease(store, "clave")
+
+        results = await asyncio.gather(*(store.reserve("clave", f"reintento-{i}") for i in range(5)))
+        assert sum(result is None for result in results) == 1
+
+    asyncio.run(scenario())
+
+
+def test_release_allows_a_new_attempt():
+    async def scenario():
+        store = IdempotencyStore(AsyncMongoMockClient()["test"])
+        await store.reserve("clave", "a")
+        await store.release("clave", "a")
+        assert await store.reserve("clave", "b") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,13 @@
+from benchmarks.bench_order_build import build_documents, make_payload
+from models.order import Order, OrderCreate
+
+
+def test_benchmark_paths_build_the_same_document():
+    first, *others = build_documents(make_payload(3))
+    assert len(others) == 2
+    assert all(document == first for document in others)
+
+
+def test_to_document_adds_search_keys():
+    document = Order.from_create(OrderCreate.model_validate(make_payload(1))).to_document()
+    assert document["search"]["email"] == "maria@example.com"
@@ -0,0 +1,77 @@
+import asyncio
+from zoneinfo import ZoneInfo
+
+from mongomock_motor import AsyncMongoMockClient
+
+from services.order_numbers import OrderNumberGenerator
+from services.settings import DEFAULT_TIMEZONE
+
+TZ = ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def make_generator(db, day="20261018", block_size=3) -> OrderNumberGenerator:
+    generator = OrderNumberGenerator(db, TZ, block_size=block_size)
+    generator.today = lambda: day
+    return generator
+
+
+def test_numbers_come_from_reserved_blocks():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        generator = make_generator(db)
+        numbers = [await generator.next_number() for _ in range(7)]
+        assert numbers == [f"AIR-20261018-{n:06d}" for n in range(1, 8)]
+        # 7 números en bloques de 3: tres reservas
+        assert (await db.order_counters.find_one({"_id": "20261018"}))["sequence"] == 9
+
+    asyncio.run(scenario())
+
+
+def test_workers_never_share_numbers():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        workers = [make_generator(db) for _ in range(3)]
+        numbers = []
+        for _ in range(5):
+            for worker in workers:
+                numbers.append(await worker.next_number())
+        assert len(set(numbers)) == len(numbers)
+
+    asyncio.run(scenario())
+
+
+def test_batch_larger_than_block_is_contiguous():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        generator = make_generator(db)
+        await generator.next_number()
+        numbers = await generator.next_numbers(10)
+        assert numbers == [f"AIR-20261018-{n:06d}" for n in range(2, 12)]
+
+    asyncio.run(scenario())
+
+
+def test_sequence_restarts_each_day():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        generator = make_generator(db)
+        assert await generator.next_number() == "AIR-20261018-000001"
+        assert await generator.next_number() == "AIR-20261018-000002"
+
+        # Lo que quedaba del bloque del día anterior no se usa
+        generator.today = lambda: "20261019"
+        assert await generator.next_number() == "AIR-20261019-000001"
+        assert await db.order_counters.count_documents({}) == 2
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_requests_share_a_reservation():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        generator = make_generator(db, block_size=100)
+        numbers = await asyncio.gather(*(generator.next_number() for _ in range(50)))
+        assert sorted(numbers) == [f"AIR-20261018-{n:06d}" for n in range(1, 51)]
+        assert (await db.order_counters.find_one({"_id": "20261018"}))["sequence"] == 100
+
+    asyncio.run(scenario())
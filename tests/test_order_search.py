@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from models.search import search_keys
+from services.indexes import QUERY_SHAPES, plan_problems
+from services.order_search import SEARCH_NAME_WORDS, SEARCH_PHONES, InvalidSearch, search_filter
+from services.outbox import EmailOutbox
+from services.views import INTERNAL_FIELDS
+
+
+def test_search_keys_are_normalized():
+    keys = search_keys({
+        "nombre": "María  Pérez-Núñez", "email": " Maria@Example.COM ",
+        "telefono": "+1 (809) 555-0101", "whatsapp": "809.555.0101", "dni_rnc": "001-1234567-8",
+    })
+    assert keys == {
+        "email": "maria@example.com",
+        "phones": ["8095550101"],
+        "document": "00112345678",
+        "name_words": ["maria", "perez", "nunez"],
+    }
+
+
+def test_search_filter_matches_what_was_stored():
+    assert search_filter(telefono="1-809-555-0101") == {SEARCH_PHONES: "8095550101"}
+    assert search_filter(nombre="Pérez") == {SEARCH_NAME_WORDS: "perez"}
+    # Sólo la última palabra puede ser un prefijo, y nunca sola
+    assert search_filter(nombre="María Pér") == {
+        "$and": [{SEARCH_NAME_WORDS: "maria"}, {SEARCH_NAME_WORDS: {"$regex": "^per"}}]
+    }
+
+
+def test_query_plans_must_not_sort_in_memory():
+    shapes = {shape.name: shape for shape in QUERY_SHAPES}
+    assert plan_problems(shapes["search_orders_name"], ["LIMIT", "FETCH", "IXSCAN"]) == []
+    assert plan_problems(shapes["search_orders_name"], ["SORT", "FETCH", "IXSCAN"]) == ["SORT"]
+    assert plan_problems(shapes["get_all_orders"], ["LIMIT", "COLLSCAN"]) == ["COLLSCAN"]
+    assert plan_problems(shapes["email_outbox_claim"], ["SORT", "FETCH", "OR", "IXSCAN"]) == []
+
+
+@pytest.mark.parametrize("criteria", [{}, {"email": "  "}, {"nombre": "a"}, {"telefono": "---"}])
+def test_invalid_search(criteria):
+    with pytest.raises(InvalidSearch):
+        search_filter(**criteria)
+
+
+def test_search_keys_stay_out_of_api_responses(make_client, build_order):
+    client = make_client()
+    order = build_order(order_number="AIR-1", status="confirmed")
+    document = EmailOutbox.mark_pending(order.to_document())
+    assert "search" in document
+    client.portal.call(client.app.state.services.db.orders.insert_one, document)
+
+    responses = [
+        client.get("/api/orders/AIR-1").json(),
+        client.get("/api/orders", params={"view": "full"}).json()["orders"][0],
+        client.get("/api/orders/search", params={"email": "ana@example.com"}).json()["orders"][0],
+        json.loads(client.get("/api/orders/export").text.splitlines()[0]),
+    ]
+    for response in responses:
+        assert response["order_number"] == "AIR-1"
+        assert not set(response) & set(INTERNAL_FIELDS)
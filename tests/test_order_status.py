@@ -0,0 +1,88 @@
+import pytest
+
+ADMIN = {"Authorization": "Bearer s3creto"}
+
+
+def drain(subscription) -> list:
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_single_status_change(make_client, insert_orders):
+    client = make_client(admin_token="s3creto")
+    insert_orders(client, **{"AIR-1": "confirmed"})
+
+    response = client.patch("/api/orders/AIR-1/status", json={"status": "shipped"}, headers=ADMIN)
+    assert response.status_code == 200
+    assert response.json()["status"] == "shipped"
+    assert client.get("/api/orders/AIR-1").json()["status"] == "shipped"
+
+
+@pytest.mark.parametrize("current, target, expected_status, code", [
+    ("shipped", "shipped", None, 409),         # ya está en ese estado
+    ("confirmed", "delivered", None, 409),     # salta un estado
+    ("delivered", "shipped", None, 409),       # hacia atrás
+    ("confirmed", "pending", None, 400),       # nadie llega a pending
+    ("confirmed", "shipped", "pending", 400),  # expected_status que no lleva a shipped
+])
+def test_status_guards(make_client, insert_orders, current, target, expected_status, code):
+    client = make_client(admin_token="s3creto")
+    insert_orders(client, **{"AIR-1": current})
+
+    body = {"status": target}
+    if expected_status:
+        body["expected_status"] = expected_status
+    assert client.patch("/api/orders/AIR-1/status", json=body, headers=ADMIN).status_code == code
+    assert client.get("/api/orders/AIR-1").json()["status"] == current
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/orders/AIR-1/status", {"status": "shipped"}),
+    ("/api/orders/status", {"status": "shipped", "order_ids": ["AIR-1"]}),
+])
+def test_status_changes_require_the_admin_token(make_client, insert_orders, path, body):
+    assert make_client().patch(path, json=body).status_code == 403
+    client = make_client(admin_token="s3creto")
+    insert_orders(client, **{"AIR-1": "confirmed"})
+    assert client.patch(path, json=body).status_code == 401
+    assert client.patch(path, json=body, headers={"Authorization": "Bearer otro"}).status_code == 401
+    assert client.get("/api/orders/AIR-1").json()["status"] == "confirmed"
+
+
+def test_unknown_order(make_client):
+    client = make_client(admin_token="s3creto")
+    assert client.patch("/api/orders/nope/status", json={"status": "shipped"}, headers=ADMIN).status_code == 404
+
+
+def test_bulk_reports_every_order_once(make_client, insert_orders):
+    client = make_client(admin_token="s3creto")
+    insert_orders(client, **{"AIR-1": "shipped", "AIR-2": "confirmed", "AIR-3": "confirmed"})
+    subscription = client.app.state.services.order_events.broker.subscribe()
+
+    response = client.patch("/api/orders/status", json={
+        "status": "shipped", "order_ids": ["AIR-1", "AIR-2", "AIR-3", "nope"],
+    }, headers=ADMIN)
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": "shipped",
+        "requested": 4,
+        "updated": 2,
+        "skipped": [{"order_number": "AIR-1", "status": "shipped"}],
+        "not_found": ["nope"],
+    }
+    # Sólo las órdenes que cambiaron generan evento
+    events = drain(subscription)
+    assert sorted(event["order_number"] for event in events) == ["AIR-2", "AIR-3"]
+
+
+def test_bulk_all_updated(make_client, insert_orders):
+    client = make_client(admin_token="s3creto")
+    insert_orders(client, **{"AIR-1": "confirmed", "AIR-2": "confirmed"})
+
+    response = client.patch(
+        "/api/orders/status", json={"status": "shipped", "order_ids": ["AIR-1", "AIR-2", "AIR-1"]}, headers=ADMIN
+    )
+    assert response.json()["updated"] == 2
+    assert response.json()["skipped"] == [] and response.json()["not_found"] == []
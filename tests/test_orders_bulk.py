@@ -0,0 +1,27 @@
+ADMIN = {"Authorization": "Bearer s3creto"}
+
+
+def bulk_payload(build_order, **overrides) -> dict:
+    return build_order(**overrides).model_dump(mode="json", include={"customer", "shipping", "payment", "items"})
+
+
+def test_bulk_import_requires_the_admin_token(make_client, build_order):
+    payloads = [bulk_payload(build_order)]
+    assert make_client().post("/api/orders/bulk", json=payloads).status_code == 403
+    assert make_client(admin_token="s3creto").post("/api/orders/bulk", json=payloads).status_code == 401
+
+
+def test_bulk_import_rejects_negative_amounts(make_client, build_order):
+    client = make_client(admin_token="s3creto")
+    valid = bulk_payload(build_order)
+    negative_quantity = bulk_payload(build_order)
+    negative_quantity["items"][0]["quantity"] = -5
+    negative_total = bulk_payload(build_order, payment={"metodo_pago": "Visa", "total": -100})
+
+    response = client.post("/api/orders/bulk", json=[valid, negative_quantity, negative_total], headers=ADMIN)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted"] == 1 and report["orders"][0]["index"] == 0
+    assert [error["index"] for error in report["errors"]] == [1, 2]
+    assert report["errors"][0]["errors"][0]["loc"] == ["items", 0, "quantity"]
+    assert report["errors"][1]["errors"][0]["loc"] == ["payment", "total"]
@@ -0,0 +1,160 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+
+from services.email_service import EMAIL_CUSTOMER_CONFIRMATION, ORDER_EMAIL_KINDS
+from services.outbox import PENDING_EMAILS_FIELD, STATUS_COLLECTING, STATUS_PENDING, EmailOutbox
+
+
+def make_order(order_number: str, age: float = 120.0) -> dict:
+    created_at = datetime.utcnow() - timedelta(seconds=age)
+    return EmailOutbox.mark_pending({
+        "order_number": order_number,
+        "payment": {"metodo_pago": "Visa", "total": 100.0},
+        "created_at": created_at,
+    })
+
+
+def test_sweep_enqueues_orders_missing_from_outbox():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        outbox = EmailOutbox(db, email_service=None)
+        await db.orders.insert_many([make_order("AIR-1"), make_order("AIR-2")])
+        # AIR-1 llegó a la bandeja; AIR-2 se perdió entre las dos escrituras
+        await db.email_outbox.insert_one(outbox.build_job("AIR-1"))
+
+        assert await outbox.sweep_pending() == 1
+        jobs = await db.email_outbox.find({}, {"_id": 0, "order_number": 1, "emails": 1}).to_list(None)
+        assert sorted(job["order_number"] for job in jobs) == ["AIR-1", "AIR-2"]
+        assert all(job["emails"] == list(ORDER_EMAIL_KINDS) for job in jobs)
+        assert await db.orders.count_documents({PENDING_EMAILS_FIELD: {"$exists": True}}) == 0
+
+        # Un segundo barrido no vuelve a encolar nada
+        assert await outbox.sweep_pending() == 0
+        assert await db.email_outbox.count_documents({}) == 2
+
+    asyncio.run(scenario())
+
+
+def test_sweep_leaves_recent_orders_to_the_request():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        outbox = EmailOutbox(db, email_service=None, sweep_grace=60.0)
+        await db.orders.insert_one(make_order("AIR-1", age=5.0))
+
+        assert await outbox.sweep_pending() == 0
+        assert await db.email_outbox.count_documents({}) == 0
+        assert await db.orders.count_documents({PENDING_EMAILS_FIELD: {"$exists": True}}) == 1
+
+    asyncio.run(scenario())
+
+
+def test_sweep_counts_orders_waiting_in_a_digest():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        outbox = EmailOutbox(db, email_service=None, digest_window=300)
+        await db.orders.insert_one(make_order("AIR-1"))
+
+        assert await outbox.sweep_pending() == 1
+        # La notificación a la tienda espera en el resumen; la confirmación va sola
+        digest = await db.email_outbox.find_one({"order_numbers": "AIR-1"})
+        assert digest is not None
+        assert await outbox.sweep_pending() == 0
+
+    asyncio.run(scenario())
+
+
+def test_sweep_sends_the_confirmation_of_an_order_only_in_a_digest():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        outbox = EmailOutbox(db, email_service=None, digest_window=300)
+        await db.orders.insert_one(make_order("AIR-1"))
+        # El proceso cayó entre el resumen y el trabajo de la confirmación
+        await outbox._add_to_digest("AIR-1")
+
+        assert await outbox.sweep_pending() == 1
+        job = await db.email_outbox.find_one({"order_number": "AIR-1"})
+        assert job["emails"] == [EMAIL_CUSTOMER_CONFIRMATION]
+        digest = await db.email_outbox.find_one({"order_numbers": "AIR-1"})
+        assert digest["order_numbers"] == ["AIR-1"]
+        assert await db.orders.count_documents({PENDING_EMAILS_FIELD: {"$exists": True}}) == 0
+
+    asyncio.run(scenario())
+
+
+def test_sweep_drains_more_orders_than_one_batch():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        outbox = EmailOutbox(db, email_service=None)
+        await db.orders.insert_many([make_order(f"AIR-{i}") for i in range(7)])
+        await db.email_outbox.insert_one(outbox.build_job("AIR-0"))
+
+        assert await outbox.sweep_pending(limit=3) == 6
+        assert await db.orders.count_documents({PENDING_EMAILS_FIELD: {"$exists": True}}) == 0
+        assert await db.email_outbox.count_documents({}) == 7
+
+    asyncio.run(scenario())
+
+
+def priced_order(build_order, number: str, total: float = 100.0):
+    return build_order(order_number=number, payment={"metodo_pago": "Visa", "total": total})
+
+
+async def digest_jobs(db, status: str) -> list:
+    return await db.email_outbox.find({"status": status, "order_numbers": {"$exists": True}}).to_list(None)
+
+
+def test_digest_is_released_when_full(build_order):
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        outbox = EmailOutbox(db, email_service=None, digest_window=300, digest_max_orders=3)
+        for number in ("AIR-1", "AIR-2"):
+            await outbox.enqueue_order(priced_order(build_order, number))
+        assert len(await digest_jobs(db, STATUS_COLLECTING)) == 1
+
+        await outbox.enqueue_order(priced_order(build_order, "AIR-3"))
+        released = await digest_jobs(db, STATUS_PENDING)
+        assert [job["order_numbers"] for job in released] == [["AIR-1", "AIR-2", "AIR-3"]]
+        # La siguiente orden abre un resumen nuevo
+        await outbox.enqueue_order(priced_order(build_order, "AIR-4"))
+        assert [job["order_numbers"] for job in await digest_jobs(db, STATUS_COLLECTING)] == [["AIR-4"]]
+
+    asyncio.run(scenario())
+
+
+def test_flush_releases_digests_after_their_window(build_order):
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        outbox = EmailOutbox(db, email_service=None, digest_window=300)
+        await outbox.enqueue_order(priced_order(build_order, "AIR-1"))
+
+        assert await outbox.flush_digests() == 0
+        await db.email_outbox.update_one(
+            {"status": STATUS_COLLECTING},
+            {"$set": {"created_at": datetime.utcnow() - timedelta(seconds=301)}},
+        )
+        assert await outbox.flush_digests() == 1
+        assert [job["order_numbers"] for job in await digest_jobs(db, STATUS_PENDING)] == [["AIR-1"]]
+
+    asyncio.run(scenario())
+
+
+def test_digest_routes_each_email_kind(build_order):
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        outbox = EmailOutbox(db, email_service=None, digest_window=300, digest_immediate_total=500.0)
+        await outbox.enqueue_order(priced_order(build_order, "AIR-1"))
+        await outbox.enqueue_order(priced_order(build_order, "AIR-2", 500.0))
+
+        # La confirmación al cliente sale por orden; la notificación de la
+        # orden grande no espera al resumen
+        jobs = await db.email_outbox.find({"order_number": {"$ne": None}}).to_list(None)
+        assert {job["order_number"]: job["emails"] for job in jobs} == {
+            "AIR-1": [EMAIL_CUSTOMER_CONFIRMATION],
+            "AIR-2": list(ORDER_EMAIL_KINDS),
+        }
+        digests = await digest_jobs(db, STATUS_COLLECTING)
+        assert [job["order_numbers"] for job in digests] == [["AIR-1"]]
+
+    asyncio.run(scenario())
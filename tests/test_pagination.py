@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from services.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+
+
+def test_cursor_round_trip_with_datetime():
+    created_at = datetime(2026, 10, 18, 14, 30, 5, 123000)
+    object_id = ObjectId()
+    assert decode_cursor(encode_cursor(created_at, object_id)) == (created_at, object_id)
+
+
+def test_cursor_round_trip_with_legacy_string_date():
+    object_id = ObjectId()
+    assert decode_cursor(encode_cursor("2024-01-05T10:00:00", object_id)) == ("2024-01-05T10:00:00", object_id)
+
+
+def test_cursor_is_url_safe():
+    token = encode_cursor(datetime(2026, 1, 1), ObjectId())
+    assert "=" not in token and "+" not in token and "/" not in token
+
+
+@pytest.mark.parametrize("token", ["", "no-es-un-cursor", encode_cursor(datetime(2026, 1, 1), ObjectId())[:-4]])
+def test_invalid_cursor(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+def test_keyset_pages_cover_every_document_once():
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"].orders
+        # Varias órdenes comparten created_at: el _id desempata
+        await collection.insert_many([
+            {"created_at": datetime(2026, 10, day % 4 + 1), "n": day} for day in range(23)
+        ])
+        sort = [("created_at", -1), ("_id", -1)]
+        seen, query = [], {}
+        while True:
+            page = await collection.find(query).sort(sort).limit(5).to_list(5)
+            if not page:
+                break
+            seen.extend(doc["n"] for doc in page)
+            query = keyset_filter(*decode_cursor(encode_cursor(page[-1]["created_at"], page[-1]["_id"])))
+        expected = await collection.find({}).sort(sort).to_list(None)
+        assert seen == [doc["n"] for doc in expected]
+
+    asyncio.run(scenario())
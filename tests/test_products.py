@@ -0,0 +1,35 @@
+import pytest
+
+PRODUCT = {
+    "id": 9001, "name": "Air Test", "category": "pantalon", "price": 1.0, "image": "x.jpg",
+    "sizes": ["M"], "inStock": True,
+}
+
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_catalog_writes_are_disabled_without_admin_token(make_client, method):
+    client = make_client()
+    response = client.request(method.upper(), "/api/products/9001", json=PRODUCT)
+    assert response.status_code == 403
+
+
+def test_catalog_writes_require_the_admin_token(make_client):
+    client = make_client(admin_token="s3creto")
+    assert client.put("/api/products/9001", json=PRODUCT).status_code == 401
+    assert client.put(
+        "/api/products/9001", json=PRODUCT, headers={"Authorization": "Bearer otro"}
+    ).status_code == 401
+
+    headers = {"Authorization": "Bearer s3creto"}
+    assert client.put("/api/products/9001", json=PRODUCT, headers=headers).status_code == 200
+    assert client.get("/api/products/9001").json()["price"] == 1.0
+    assert client.delete("/api/products/9001", headers=headers).status_code == 200
+
+
+def test_catalog_conditional_requests(make_client):
+    client = make_client()
+    etag = client.get("/api/products").headers["etag"]
+    assert client.get("/api/products", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/products", headers={"If-None-Match": f'"otro", {etag}'}).status_code == 304
+    assert client.get("/api/products", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/api/products", headers={"If-None-Match": '"otro"'}).status_code == 200
@@ -0,0 +1,49 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+from pydantic import ValidationError
+
+from services.analytics import _new_totals, accumulate
+from services.settings import DEFAULT_TIMEZONE, Settings
+
+
+@pytest.mark.parametrize("variable", ["STORE_TIMEZONE", "ANALYTICS_TIMEZONE"])
+def test_timezone_is_read_when_settings_are_built(monkeypatch, variable):
+    # Las variables de .env se cargan después de importar los módulos
+    monkeypatch.delenv("STORE_TIMEZONE", raising=False)
+    monkeypatch.setenv(variable, "America/New_York")
+    settings = Settings.from_env(mongo_url="mongodb://localhost", db_name="test")
+    assert settings.store_tzinfo == ZoneInfo("America/New_York")
+
+
+def test_new_timezone_variable_wins(monkeypatch):
+    monkeypatch.setenv("STORE_TIMEZONE", "America/New_York")
+    monkeypatch.setenv("ANALYTICS_TIMEZONE", "Europe/Madrid")
+    settings = Settings.from_env(mongo_url="mongodb://localhost", db_name="test")
+    assert settings.store_timezone == "America/New_York"
+
+
+def test_default_timezone(monkeypatch):
+    monkeypatch.delenv("STORE_TIMEZONE", raising=False)
+    monkeypatch.delenv("ANALYTICS_TIMEZONE", raising=False)
+    settings = Settings.from_env(mongo_url="mongodb://localhost", db_name="test")
+    assert settings.store_tzinfo == ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def test_unknown_timezone_is_rejected():
+    with pytest.raises(ValidationError):
+        Settings(mongo_url="mongodb://localhost", db_name="test", store_timezone="Marte/Olympus")
+
+
+def test_rollup_days_use_the_store_timezone():
+    order = {
+        # 02:30 UTC del 19 es todavía el 18 en Santo Domingo (UTC-4)
+        "created_at": datetime(2026, 10, 19, 2, 30),
+        "payment": {"metodo_pago": "Visa", "total": 10.0},
+        "shipping": {"provincia": "Santiago"},
+        "items": [],
+    }
+    totals = _new_totals()
+    accumulate(totals, order, ZoneInfo(DEFAULT_TIMEZONE))
+    assert {day for _, day, _ in totals} == {"2026-10-18"}
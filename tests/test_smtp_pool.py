@@ -0,0 +1,63 @@
+import socket
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from scripts.smtp_sink import start_sink
+from services.email_service import EmailService
+from services.settings import DEFAULT_TIMEZONE
+from services.smtp_pool import SMTPConnectionPool
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def sink():
+    controller = start_sink(port=free_port())
+    yield controller
+    controller.stop()
+
+
+def make_pool(sink, **options) -> SMTPConnectionPool:
+    return SMTPConnectionPool(sink.hostname, sink.port, use_tls=False, **options)
+
+
+def test_order_emails_share_one_session(sink, monkeypatch, build_order):
+    monkeypatch.setenv("SMTP_HOST", sink.hostname)
+    monkeypatch.setenv("SMTP_PORT", str(sink.port))
+    monkeypatch.setenv("SMTP_USE_TLS", "false")
+    service = EmailService(ZoneInfo(DEFAULT_TIMEZONE))
+    try:
+        results = service.send_order_emails(build_order())
+    finally:
+        service.close()
+    assert all(results.values())
+    assert (sink.handler.sessions, sink.handler.messages) == (1, 2)
+
+
+def test_session_is_retired_after_max_messages(sink):
+    pool = make_pool(sink, max_messages_per_session=2)
+    for _ in range(5):
+        pool.sendmail("tienda@example.com", ["cliente@example.com"], "Subject: prueba\n\nhola")
+    pool.close()
+    assert (sink.handler.sessions, sink.handler.messages) == (3, 5)
+
+
+def test_pool_reconnects_when_the_server_closed_the_session():
+    port = free_port()
+    first = start_sink(port=port)
+    pool = SMTPConnectionPool(first.hostname, port, use_tls=False)
+    pool.sendmail("tienda@example.com", ["cliente@example.com"], "Subject: prueba\n\nhola")
+    # El servidor se reinicia: la sesión guardada en el pool ya no sirve
+    first.stop()
+    restarted = start_sink(port=port)
+    try:
+        pool.sendmail("tienda@example.com", ["cliente@example.com"], "Subject: prueba\n\nhola")
+        pool.close()
+        assert (restarted.handler.sessions, restarted.handler.messages) == (1, 1)
+    finally:
+        restarted.stop()
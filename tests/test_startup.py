@@ -0,0 +1,12 @@
+from benchmarks.bench_startup import DEFAULT_BUDGET_MS, forbidden_imports, import_time_ms, measure_import
+
+
+def test_import_server_within_budget():
+    # La primera ejecución paga la compilación de los .pyc y no cuenta
+    measure_import("server")
+    timings = [import_time_ms(measure_import("server"), "server") for _ in range(3)]
+    assert min(timings) <= DEFAULT_BUDGET_MS, f"import server tarda {min(timings):.0f} ms"
+
+
+def test_import_server_skips_heavy_packages():
+    assert forbidden_imports(measure_import("server")) == []
@@ -0,0 +1,26 @@
+import pytest
+
+from services.views import SUMMARY_FIELDS, InvalidFields, order_projection
+
+
+def test_fields_projection_always_includes_created_at():
+    assert order_projection(fields="order_number, customer.email") == {
+        "order_number": 1, "customer.email": 1, "created_at": 1,
+    }
+
+
+def test_summary_view():
+    assert order_projection("summary") == {field: 1 for field in SUMMARY_FIELDS}
+
+
+@pytest.mark.parametrize("fields", [
+    "secreto",                  # campo desconocido
+    "customer,customer.email",  # colisión de rutas
+    "items,items.price",
+    "items.$",                  # proyección posicional
+    "customer.$email",
+    "customer..email",
+])
+def test_rejected_fields(fields):
+    with pytest.raises(InvalidFields):
+        order_projection(fields=fields)